@@ -2,6 +2,7 @@
 Authentication API Endpoints
 """
 
+from datetime import datetime, timezone
 from flask import request
 from flask_restx import Namespace, Resource, fields
 import auth
@@ -128,7 +129,6 @@ class Login(Resource):
             
             if failed_attempts >= 3:
                 lockout_duration = auth.calculate_lockout_duration(failed_attempts)
-                from datetime import datetime, timezone
                 locked_until = (datetime.now(timezone.utc) + lockout_duration).isoformat()
                 conn.execute('''
                     UPDATE users 
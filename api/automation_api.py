@@ -80,7 +80,7 @@ class AutomationRuleList(Resource):
         automations = conn.execute(query, params).fetchall()
         conn.close()
         
-        return [dict(a) for a in automations]
+        return automations
     
     @automation_ns.doc('create_automation_rule',
                        description='Create a new automation rule',
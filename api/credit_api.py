@@ -2,6 +2,7 @@
 Credit API Endpoints
 """
 
+from bisect import bisect_right
 from flask import request
 from flask_restx import Namespace, Resource, fields
 from datetime import datetime
@@ -10,6 +11,10 @@ import database
 
 credit_ns = Namespace('credit', description='Credit information and accounts')
 
+# Utilization breakpoints (%) and the score for each band between them
+UTILIZATION_BREAKPOINTS = (10, 30, 50, 70)
+SCORE_BANDS = (780, 720, 680, 650, 600)
+
 # Models
 credit_account_model = credit_ns.model('CreditAccount', {
     'id': fields.Integer(readonly=True, description='Account ID'),
@@ -57,23 +62,16 @@ class CreditScore(Resource):
         utilization = 0
         
         if accounts:
-            total_balance = sum(float(a['balance'] or 0) for a in accounts)
-            total_limit = sum(float(a['credit_limit'] or 0) for a in accounts)
+            total_balance = total_limit = 0.0
+            for a in accounts:
+                total_balance += float(a['balance'] or 0)
+                total_limit += float(a['credit_limit'] or 0)
             
             if total_limit > 0:
                 utilization = (total_balance / total_limit) * 100
                 
                 # Simplified score calculation based on utilization
-                if utilization < 10:
-                    score = 780
-                elif utilization < 30:
-                    score = 720
-                elif utilization < 50:
-                    score = 680
-                elif utilization < 70:
-                    score = 650
-                else:
-                    score = 600
+                score = SCORE_BANDS[bisect_right(UTILIZATION_BREAKPOINTS, utilization)]
         
         return {
             'score': score,
@@ -127,4 +125,5 @@ class CreditAccountList(Resource):
         accounts = conn.execute(query, params).fetchall()
         conn.close()
         
-        return [dict(a) for a in accounts]
+        # marshal reads sqlite3.Row by key, no dict copy needed
+        return accounts
@@ -101,7 +101,7 @@ class DisputeList(Resource):
         disputes = conn.execute(query, params).fetchall()
         conn.close()
         
-        return [dict(d) for d in disputes]
+        return disputes
     
     @disputes_ns.doc('create_dispute',
                      description='Create a new dispute',
@@ -6,6 +6,8 @@ Flask web app for credit automation dashboard
 
 import os
 import sqlite3
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from functools import wraps
 from dotenv import load_dotenv
@@ -16,6 +18,7 @@ from flask_limiter.util import get_remote_address
 import database
 import automation
 import auth
+import queries
 
 # Load environment variables
 load_dotenv()
@@ -53,6 +56,70 @@ def set_security_headers(response):
 # Database helper functions
 get_db = database.get_db
 
+# Automation side-effects run on a single background writer so SQLite
+# writes stay serialized and request handlers return immediately
+_executor = ThreadPoolExecutor(max_workers=1)
+
+def _log_background_failure(future):
+    """Log errors from queued work; nothing else reads the future"""
+    exc = future.exception()
+    if exc is not None:
+        app.logger.error('Background task failed', exc_info=exc)
+
+def run_in_background(fn, *args):
+    """Queue automation work off the request thread"""
+    future = _executor.submit(fn, *args)
+    future.add_done_callback(_log_background_failure)
+    return future
+
+# How long a cached health score stays valid
+HEALTH_SCORE_TTL = timedelta(minutes=5)
+
+def calculate_utilization(accounts):
+    """Overall utilization percentage across accounts, in a single pass"""
+    total_balance = 0
+    total_limit = 0
+    for a in accounts:
+        balance, limit = a['balance'], a['credit_limit']
+        if balance:
+            total_balance += balance
+        if limit and limit > 0:
+            total_limit += limit
+    if total_limit > 0:
+        return (total_balance / total_limit) * 100
+    return None
+
+def calculate_health_score(accounts, utilization=None):
+    """Estimate a health score from credit utilization (simplified)"""
+    if utilization is None:
+        utilization = calculate_utilization(accounts)
+    if utilization is None:
+        return 750  # Default
+    if utilization < 10:
+        return 780
+    elif utilization < 30:
+        return 720
+    return 650
+
+def get_health_score(conn, user, accounts=None):
+    """Return the user's cached health score, recomputing it when stale"""
+    if user is None:
+        # Session outlived its user row; nothing to read or cache
+        return calculate_health_score(())
+    
+    computed_at = user['health_score_computed_at']
+    if computed_at and user['cached_health_score'] is not None:
+        if datetime.now() - datetime.fromisoformat(computed_at) < HEALTH_SCORE_TTL:
+            return user['cached_health_score']
+    
+    if accounts is None:
+        accounts = conn.execute(queries.GET_ACCOUNT_BALANCES, (user['id'],)).fetchall()
+    
+    score = calculate_health_score(accounts)
+    conn.execute(queries.CACHE_HEALTH_SCORE, (score, datetime.now().isoformat(), user['id']))
+    conn.commit()
+    return score
+
 def login_required(f):
     """Decorator to require login"""
     @wraps(f)
@@ -103,7 +170,7 @@ def register():
     
     # Check if user exists
     conn = get_db()
-    existing = conn.execute('SELECT id FROM users WHERE email = ?', (email,)).fetchone()
+    existing = conn.execute(queries.GET_USER_ID_BY_EMAIL, (email,)).fetchone()
     if existing:
         flash('Email already registered. Please login.', 'error')
         conn.close()
@@ -111,10 +178,8 @@ def register():
     
     # Create user
     cursor = conn.cursor()
-    cursor.execute('''
-        INSERT INTO users (email, password_hash, name, notification_preference, automation_level)
-        VALUES (?, ?, ?, ?, ?)
-    ''', (email, password_hash, name or None, 'email', 'basic'))
+    cursor.execute(queries.INSERT_USER,
+                   (email, password_hash, name or None, 'email', 'basic'))
     user_id = cursor.lastrowid
     conn.commit()
     conn.close()
@@ -138,7 +203,7 @@ def login():
         return redirect(url_for('index'))
     
     conn = get_db()
-    user = conn.execute('SELECT * FROM users WHERE email = ?', (email,)).fetchone()
+    user = conn.execute(queries.GET_USER_BY_EMAIL, (email,)).fetchone()
     
     if not user:
         flash('Invalid email or password', 'error')
@@ -168,18 +233,13 @@ def login():
             lockout_duration = auth.calculate_lockout_duration(failed_attempts)
             locked_until = datetime.now() + lockout_duration
             
-            conn.execute('''
-                UPDATE users 
-                SET failed_login_attempts = ?, account_locked_until = ?
-                WHERE id = ?
-            ''', (failed_attempts, locked_until.isoformat(), user['id']))
+            conn.execute(queries.LOCK_USER,
+                         (failed_attempts, locked_until.isoformat(), user['id']))
             conn.commit()
             
             flash(f'Too many failed attempts. Account locked for {lockout_duration.seconds // 60} minutes.', 'error')
         else:
-            conn.execute('''
-                UPDATE users SET failed_login_attempts = ? WHERE id = ?
-            ''', (failed_attempts, user['id']))
+            conn.execute(queries.SET_FAILED_LOGIN_ATTEMPTS, (failed_attempts, user['id']))
             conn.commit()
             
             flash('Invalid email or password', 'error')
@@ -188,11 +248,7 @@ def login():
         return redirect(url_for('index'))
     
     # Reset failed attempts and update last login
-    conn.execute('''
-        UPDATE users 
-        SET failed_login_attempts = 0, account_locked_until = NULL, last_login = CURRENT_TIMESTAMP
-        WHERE id = ?
-    ''', (user['id'],))
+    conn.execute(queries.RECORD_SUCCESSFUL_LOGIN, (user['id'],))
     conn.commit()
     conn.close()
     
@@ -227,11 +283,11 @@ def set_password():
     user_id = session['migration_user_id']
     
     conn = get_db()
-    conn.execute('UPDATE users SET password_hash = ? WHERE id = ?', (password_hash, user_id))
+    conn.execute(queries.SET_PASSWORD_HASH, (password_hash, user_id))
     conn.commit()
     
     # Get user email
-    user = conn.execute('SELECT email FROM users WHERE id = ?', (user_id,)).fetchone()
+    user = conn.execute(queries.GET_USER_EMAIL, (user_id,)).fetchone()
     conn.close()
     
     # Login user
@@ -253,59 +309,31 @@ def logout():
 @login_required
 def dashboard():
     """Main dashboard"""
-    conn = get_db()
     user_id = session['user_id']
     
-    # Get user info
-    user = conn.execute('SELECT * FROM users WHERE id = ?', (user_id,)).fetchone()
+    with database.connection() as conn:
+        # Get user info
+        user = conn.execute(queries.GET_USER, (user_id,)).fetchone()
     
-    # Get accounts
-    accounts = conn.execute('''
-        SELECT * FROM accounts WHERE user_id = ?
-        ORDER BY account_type, name
-    ''', (user_id,)).fetchall()
+        # Get accounts
+        accounts = conn.execute(queries.GET_ACCOUNTS_FOR_DASHBOARD, (user_id,)).fetchall()
     
-    # Get automations
-    automations = conn.execute('''
-        SELECT * FROM automations WHERE user_id = ? AND is_active = 1
-        ORDER BY created_at
-    ''', (user_id,)).fetchall()
+        # Get automations
+        automations = conn.execute(queries.GET_ACTIVE_AUTOMATIONS_FOR_USER, (user_id,)).fetchall()
     
-    # Get upcoming reminders (next 7 days)
-    today = datetime.now().strftime('%Y-%m-%d')
-    next_week = (datetime.now() + timedelta(days=7)).strftime('%Y-%m-%d')
+        # Get upcoming reminders (next 7 days)
+        today = datetime.now().strftime('%Y-%m-%d')
+        next_week = (datetime.now() + timedelta(days=7)).strftime('%Y-%m-%d')
     
-    reminders = conn.execute('''
-        SELECT * FROM reminders 
-        WHERE user_id = ? AND reminder_date BETWEEN ? AND ? AND is_sent = 0
-        ORDER BY reminder_date
-    ''', (user_id, today, next_week)).fetchall()
+        reminders = conn.execute(queries.GET_UPCOMING_REMINDERS,
+                                 (user_id, today, next_week)).fetchall()
     
-    # Get active disputes
-    disputes = conn.execute('''
-        SELECT * FROM disputes 
-        WHERE user_id = ? AND status IN ('pending', 'in_progress')
-        ORDER BY follow_up_date
-    ''', (user_id,)).fetchall()
-    
-    conn.close()
+        # Get active disputes
+        disputes = conn.execute(queries.GET_ACTIVE_DISPUTES_FOR_USER, (user_id,)).fetchall()
     
-    # Calculate health score (simplified)
-    health_score = 750  # Default
-    if len(accounts) > 0:
-        # Simple scoring based on utilization
-        total_balance = sum(a['balance'] for a in accounts if a['balance'])
-        total_limit = sum(a['credit_limit'] for a in accounts if a['credit_limit'])
-        if total_limit > 0:
-            utilization = (total_balance / total_limit) * 100
-            if utilization < 10:
-                health_score = 780
-            elif utilization < 30:
-                health_score = 720
-            else:
-                health_score = 650
-    
-    return render_template('dashboard.html', 
+        health_score = get_health_score(conn, user, accounts)
+
+    return render_template('dashboard.html',
                           user=user,
                           accounts=accounts,
                           automations=automations,
@@ -353,19 +381,16 @@ def add_account():
         flash('Minimum payment must be a valid number', 'error')
         return redirect(url_for('dashboard'))
     
-    conn = get_db()
-    conn.execute('''
-        INSERT INTO accounts (user_id, name, account_type, balance, credit_limit, 
-                             statement_date, due_date, min_payment)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-    ''', (user_id, name, account_type, balance, credit_limit, 
-          statement_date, due_date, min_payment))
-    conn.commit()
-    conn.close()
+    with database.connection() as conn:
+        conn.execute(queries.INSERT_ACCOUNT,
+                     (user_id, name, account_type, balance, credit_limit,
+                      statement_date, due_date, min_payment))
+        conn.execute(queries.INVALIDATE_HEALTH_SCORE, (user_id,))
+        conn.commit()
     
     # Create statement alert reminder if statement_date provided
     if statement_date:
-        automation.generate_statement_alert(user_id, None, name, statement_date)
+        run_in_background(automation.generate_statement_alert, user_id, None, name, statement_date)
     
     flash(f'Account "{name}" added successfully', 'success')
     return redirect(url_for('dashboard'))
@@ -377,8 +402,8 @@ def delete_account(account_id):
     user_id = session['user_id']
     
     conn = get_db()
-    conn.execute('DELETE FROM accounts WHERE id = ? AND user_id = ?', 
-                (account_id, user_id))
+    conn.execute(queries.DELETE_ACCOUNT, (account_id, user_id))
+    conn.execute(queries.INVALIDATE_HEALTH_SCORE, (user_id,))
     conn.commit()
     conn.close()
     
@@ -392,13 +417,10 @@ def update_balance(account_id):
     user_id = session['user_id']
     balance = float(request.form.get('balance', 0))
     
-    conn = get_db()
-    conn.execute('''
-        UPDATE accounts SET balance = ?, last_updated = CURRENT_TIMESTAMP
-        WHERE id = ? AND user_id = ?
-    ''', (balance, account_id, user_id))
-    conn.commit()
-    conn.close()
+    with database.connection() as conn:
+        conn.execute(queries.UPDATE_ACCOUNT_BALANCE, (balance, account_id, user_id))
+        conn.execute(queries.INVALIDATE_HEALTH_SCORE, (user_id,))
+        conn.commit()
     
     flash('Balance updated', 'success')
     return redirect(url_for('dashboard'))
@@ -409,20 +431,11 @@ def toggle_automation(auto_id):
     """Toggle automation on/off"""
     user_id = session['user_id']
     
-    conn = get_db()
-    current = conn.execute('''
-        SELECT is_active FROM automations WHERE id = ? AND user_id = ?
-    ''', (auto_id, user_id)).fetchone()
-    
-    if current:
-        new_status = 0 if current['is_active'] else 1
-        conn.execute('''
-            UPDATE automations SET is_active = ? WHERE id = ? AND user_id = ?
-        ''', (new_status, auto_id, user_id))
+    # Flip the flag in SQL so there's no read-then-write round trip
+    with database.connection() as conn:
+        conn.execute(queries.TOGGLE_AUTOMATION, (auto_id, user_id))
         conn.commit()
     
-    conn.close()
-    
     flash('Automation updated', 'success')
     return redirect(url_for('dashboard'))
 
@@ -440,10 +453,8 @@ def add_dispute():
     follow_up_date = (datetime.now() + timedelta(days=14)).strftime('%Y-%m-%d')
     
     conn = get_db()
-    conn.execute('''
-        INSERT INTO disputes (user_id, bureau, account_name, dispute_date, follow_up_date, notes)
-        VALUES (?, ?, ?, ?, ?, ?)
-    ''', (user_id, bureau, account_name, dispute_date, follow_up_date, notes))
+    conn.execute(queries.INSERT_DISPUTE,
+                 (user_id, bureau, account_name, dispute_date, follow_up_date, notes))
     conn.commit()
     conn.close()
     
@@ -458,9 +469,7 @@ def update_dispute(dispute_id):
     status = request.form.get('status')
     
     conn = get_db()
-    conn.execute('''
-        UPDATE disputes SET status = ? WHERE id = ? AND user_id = ?
-    ''', (status, dispute_id, user_id))
+    conn.execute(queries.UPDATE_DISPUTE_STATUS, (status, dispute_id, user_id))
     conn.commit()
     conn.close()
     
@@ -474,9 +483,7 @@ def complete_reminder(reminder_id):
     user_id = session['user_id']
     
     conn = get_db()
-    conn.execute('''
-        UPDATE reminders SET is_sent = 1 WHERE id = ? AND user_id = ?
-    ''', (reminder_id, user_id))
+    conn.execute(queries.COMPLETE_REMINDER, (reminder_id, user_id))
     conn.commit()
     conn.close()
     
@@ -489,24 +496,10 @@ def api_health_score():
     user_id = session['user_id']
     
     conn = get_db()
-    accounts = conn.execute('SELECT * FROM accounts WHERE user_id = ?', (user_id,)).fetchall()
+    user = conn.execute(queries.GET_USER, (user_id,)).fetchone()
+    score = get_health_score(conn, user)
     conn.close()
     
-    # Calculate score
-    score = 750
-    if accounts:
-        total_balance = sum(a['balance'] for a in accounts if a['balance'])
-        total_limit = sum(a['credit_limit'] for a in accounts if a['credit_limit'] and a['credit_limit'] > 0)
-        
-        if total_limit > 0:
-            utilization = (total_balance / total_limit) * 100
-            if utilization < 10:
-                score = 780
-            elif utilization < 30:
-                score = 720
-            else:
-                score = 650
-    
     return jsonify({
         'score': score,
         'date': datetime.now().strftime('%Y-%m-%d')
@@ -521,16 +514,12 @@ def api_upcoming_reminders():
     today = datetime.now().strftime('%Y-%m-%d')
     next_week = (datetime.now() + timedelta(days=7)).strftime('%Y-%m-%d')
     
-    conn = get_db()
-    reminders = conn.execute('''
-        SELECT id, reminder_type, reminder_date, message
-        FROM reminders 
-        WHERE user_id = ? AND reminder_date BETWEEN ? AND ? AND is_sent = 0
-        ORDER BY reminder_date
-    ''', (user_id, today, next_week)).fetchall()
-    conn.close()
+    with database.connection(readonly=True) as conn:
+        # Build the payload straight off the cursor instead of fetchall() + copy
+        reminders = [dict(r) for r in conn.execute(queries.GET_UPCOMING_REMINDER_SUMMARIES,
+                                                   (user_id, today, next_week))]
     
-    return jsonify([dict(r) for r in reminders])
+    return jsonify(reminders)
 
 # ==================== API ENDPOINTS ====================
 # API Authentication endpoints
@@ -561,17 +550,15 @@ def api_register():
     
     # Check if user exists
     conn = get_db()
-    existing = conn.execute('SELECT id FROM users WHERE email = ?', (email,)).fetchone()
+    existing = conn.execute(queries.GET_USER_ID_BY_EMAIL, (email,)).fetchone()
     if existing:
         conn.close()
         return jsonify({'error': 'Email already registered'}), 400
     
     # Create user
     cursor = conn.cursor()
-    cursor.execute('''
-        INSERT INTO users (email, password_hash, name, notification_preference, automation_level)
-        VALUES (?, ?, ?, ?, ?)
-    ''', (email, password_hash, name or None, 'email', 'basic'))
+    cursor.execute(queries.INSERT_USER,
+                   (email, password_hash, name or None, 'email', 'basic'))
     user_id = cursor.lastrowid
     conn.commit()
     conn.close()
@@ -599,7 +586,7 @@ def api_login():
         return jsonify({'error': 'Email and password are required'}), 400
     
     conn = get_db()
-    user = conn.execute('SELECT * FROM users WHERE email = ?', (email,)).fetchone()
+    user = conn.execute(queries.GET_USER_BY_EMAIL, (email,)).fetchone()
     
     if not user:
         conn.close()
@@ -620,27 +607,18 @@ def api_login():
             lockout_duration = auth.calculate_lockout_duration(failed_attempts)
             locked_until = datetime.now() + lockout_duration
             
-            conn.execute('''
-                UPDATE users 
-                SET failed_login_attempts = ?, account_locked_until = ?
-                WHERE id = ?
-            ''', (failed_attempts, locked_until.isoformat(), user['id']))
+            conn.execute(queries.LOCK_USER,
+                         (failed_attempts, locked_until.isoformat(), user['id']))
             conn.commit()
         else:
-            conn.execute('''
-                UPDATE users SET failed_login_attempts = ? WHERE id = ?
-            ''', (failed_attempts, user['id']))
+            conn.execute(queries.SET_FAILED_LOGIN_ATTEMPTS, (failed_attempts, user['id']))
             conn.commit()
         
         conn.close()
         return jsonify({'error': 'Invalid credentials'}), 401
     
     # Reset failed attempts and update last login
-    conn.execute('''
-        UPDATE users 
-        SET failed_login_attempts = 0, account_locked_until = NULL, last_login = CURRENT_TIMESTAMP
-        WHERE id = ?
-    ''', (user['id'],))
+    conn.execute(queries.RECORD_SUCCESSFUL_LOGIN, (user['id'],))
     conn.commit()
     conn.close()
     
@@ -660,7 +638,7 @@ def api_refresh_token():
     user_id = request.user_id
     
     conn = get_db()
-    user = conn.execute('SELECT email FROM users WHERE id = ?', (user_id,)).fetchone()
+    user = conn.execute(queries.GET_USER_EMAIL, (user_id,)).fetchone()
     conn.close()
     
     if not user:
@@ -684,25 +662,17 @@ def api_get_api_token():
     if request.method == 'POST':
         # Generate new API token
         api_token = auth.generate_api_token()
-        conn.execute('''
-            UPDATE users 
-            SET api_token = ?, api_token_created = CURRENT_TIMESTAMP
-            WHERE id = ?
-        ''', (api_token, user_id))
+        conn.execute(queries.SET_API_TOKEN, (api_token, user_id))
         conn.commit()
     else:
         # Retrieve existing token
-        user = conn.execute('SELECT api_token FROM users WHERE id = ?', (user_id,)).fetchone()
+        user = conn.execute(queries.GET_API_TOKEN, (user_id,)).fetchone()
         api_token = user['api_token']
         
         if not api_token:
             # Generate if doesn't exist
             api_token = auth.generate_api_token()
-            conn.execute('''
-                UPDATE users 
-                SET api_token = ?, api_token_created = CURRENT_TIMESTAMP
-                WHERE id = ?
-            ''', (api_token, user_id))
+            conn.execute(queries.SET_API_TOKEN, (api_token, user_id))
             conn.commit()
     
     conn.close()
@@ -720,24 +690,14 @@ def api_v1_credit_score():
     user_id = request.user_id
     
     conn = get_db()
-    accounts = conn.execute('SELECT * FROM accounts WHERE user_id = ?', (user_id,)).fetchall()
+    accounts = conn.execute(queries.GET_ACCOUNT_BALANCES, (user_id,)).fetchall()
     conn.close()
     
     # Calculate score
-    score = 750
-    utilization = 0
-    if accounts:
-        total_balance = sum(a['balance'] for a in accounts if a['balance'])
-        total_limit = sum(a['credit_limit'] for a in accounts if a['credit_limit'] and a['credit_limit'] > 0)
-        
-        if total_limit > 0:
-            utilization = (total_balance / total_limit) * 100
-            if utilization < 10:
-                score = 780
-            elif utilization < 30:
-                score = 720
-            else:
-                score = 650
+    utilization = calculate_utilization(accounts)
+    score = calculate_health_score(accounts, utilization)
+    if utilization is None:
+        utilization = 0
     
     return jsonify({
         'score': score,
@@ -752,16 +712,10 @@ def api_v1_credit_accounts():
     """Get all credit accounts"""
     user_id = request.user_id
     
-    conn = get_db()
-    accounts = conn.execute('''
-        SELECT id, name, account_type, balance, credit_limit, 
-               statement_date, due_date, last_updated
-        FROM accounts WHERE user_id = ?
-        ORDER BY account_type, name
-    ''', (user_id,)).fetchall()
-    conn.close()
+    with database.connection(readonly=True) as conn:
+        accounts = [dict(a) for a in conn.execute(queries.GET_CREDIT_ACCOUNTS, (user_id,))]
     
-    return jsonify([dict(a) for a in accounts]), 200
+    return jsonify(accounts), 200
 
 @app.route('/api/v1/automation/rules', methods=['GET', 'POST'])
 @auth.token_required
@@ -771,14 +725,10 @@ def api_v1_automation_rules():
     conn = get_db()
     
     if request.method == 'GET':
-        automations = conn.execute('''
-            SELECT id, automation_type, is_active, configuration, created_at, last_run
-            FROM automations WHERE user_id = ?
-            ORDER BY created_at
-        ''', (user_id,)).fetchall()
+        automations = [dict(a) for a in conn.execute(queries.GET_AUTOMATION_RULES, (user_id,))]
         conn.close()
         
-        return jsonify([dict(a) for a in automations]), 200
+        return jsonify(automations), 200
     
     else:  # POST
         data = request.get_json()
@@ -790,10 +740,7 @@ def api_v1_automation_rules():
             return jsonify({'error': 'Automation type is required'}), 400
         
         cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO automations (user_id, automation_type, configuration, is_active)
-            VALUES (?, ?, ?, 1)
-        ''', (user_id, automation_type, configuration))
+        cursor.execute(queries.INSERT_AUTOMATION_RULE, (user_id, automation_type, configuration))
         auto_id = cursor.lastrowid
         conn.commit()
         conn.close()
@@ -812,7 +759,7 @@ def api_v1_disputes():
     
     if request.method == 'GET':
         status_filter = request.args.get('status')
-        query = 'SELECT * FROM disputes WHERE user_id = ?'
+        query = queries.GET_DISPUTES_FOR_USER
         params = [user_id]
         
         if status_filter:
@@ -821,10 +768,10 @@ def api_v1_disputes():
         
         query += ' ORDER BY dispute_date DESC'
         
-        disputes = conn.execute(query, params).fetchall()
+        disputes = [dict(d) for d in conn.execute(query, params)]
         conn.close()
         
-        return jsonify([dict(d) for d in disputes]), 200
+        return jsonify(disputes), 200
     
     else:  # POST
         data = request.get_json()
@@ -841,11 +788,9 @@ def api_v1_disputes():
         follow_up_date = (datetime.now() + timedelta(days=14)).strftime('%Y-%m-%d')
         
         cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO disputes 
-            (user_id, bureau, creditor, reason, dispute_date, date_filed, follow_up_date, notes, status)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'pending')
-        ''', (user_id, bureau, creditor, reason, dispute_date, dispute_date, follow_up_date, notes))
+        cursor.execute(queries.INSERT_API_DISPUTE,
+                       (user_id, bureau, creditor, reason, dispute_date, dispute_date,
+                        follow_up_date, notes))
         dispute_id = cursor.lastrowid
         conn.commit()
         conn.close()
@@ -864,9 +809,7 @@ def api_v1_dispute_detail(dispute_id):
     conn = get_db()
     
     # Verify ownership
-    dispute = conn.execute('''
-        SELECT * FROM disputes WHERE id = ? AND user_id = ?
-    ''', (dispute_id, user_id)).fetchone()
+    dispute = conn.execute(queries.GET_DISPUTE_FOR_USER, (dispute_id, user_id)).fetchone()
     
     if not dispute:
         conn.close()
@@ -913,7 +856,7 @@ def api_v1_dispute_detail(dispute_id):
         return jsonify({'message': 'Dispute updated'}), 200
     
     else:  # DELETE
-        conn.execute('DELETE FROM disputes WHERE id = ? AND user_id = ?', (dispute_id, user_id))
+        conn.execute(queries.DELETE_DISPUTE, (dispute_id, user_id))
         conn.commit()
         conn.close()
         return jsonify({'message': 'Dispute deleted'}), 200
@@ -926,11 +869,7 @@ def api_v1_user_profile():
     conn = get_db()
     
     if request.method == 'GET':
-        user = conn.execute('''
-            SELECT id, email, name, phone, notification_preference, 
-                   automation_level, created_at, last_login
-            FROM users WHERE id = ?
-        ''', (user_id,)).fetchone()
+        user = conn.execute(queries.GET_USER_PROFILE, (user_id,)).fetchone()
         conn.close()
         
         if not user:
@@ -974,10 +913,8 @@ def api_v1_user_profile():
 create_automated_reminder = automation.create_automated_reminder
 
 if __name__ == '__main__':
-    # Ensure database exists
-    if not os.path.exists('database/credstack.db'):
-        print("Database not found. Running setup...")
-        import subprocess
-        subprocess.run(['python', 'setup.py'])
+    # Ensure database exists; don't serve against a half-initialized one
+    if not database.init_db(verbose=True):
+        sys.exit(1)
     
     app.run(debug=True, port=5000)
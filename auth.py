@@ -7,7 +7,9 @@ Handles password hashing, JWT tokens, and user authentication
 import bcrypt
 import jwt
 import secrets
-from datetime import datetime, timedelta
+import hashlib
+import time
+from datetime import datetime, timedelta, timezone
 from functools import wraps
 from flask import request, jsonify, session
 import os
@@ -18,14 +20,32 @@ JWT_SECRET = os.getenv('JWT_SECRET_KEY', 'jwt-secret-change-this')
 JWT_ALGORITHM = 'HS256'
 JWT_EXPIRATION_HOURS = 24
 
+# Verified token payloads, keyed by a digest of the token so raw tokens are
+# never held in memory. Entries are trusted for a short window only.
+JWT_VERIFY_CACHE_TTL = 30
+JWT_VERIFY_CACHE_SIZE = 10000
+_jwt_verify_cache = {}
+
 # Password requirements
 MIN_PASSWORD_LENGTH = 8
 REQUIRE_LETTER = True
 REQUIRE_NUMBER = True
 
+# Progressive lockout: 5 min, 15 min, 30 min, 1 hour, then 24 hours
+LOCKOUT_DURATIONS = (
+    timedelta(minutes=5),   # 3 failed attempts
+    timedelta(minutes=15),  # 4 failed attempts
+    timedelta(minutes=30),  # 5 failed attempts
+    timedelta(hours=1),     # 6 failed attempts
+    timedelta(hours=24)     # 7+ failed attempts
+)
+
+# bcrypt work factor; the test suite lowers this since cost is exponential
+BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', '12'))
+
 def hash_password(password):
     """Hash a password using bcrypt"""
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode('utf-8')
 
 def verify_password(password, password_hash):
     """Verify a password against its hash"""
@@ -39,10 +59,10 @@ def validate_password(password):
     if len(password) < MIN_PASSWORD_LENGTH:
         return False, f"Password must be at least {MIN_PASSWORD_LENGTH} characters"
     
-    if REQUIRE_LETTER and not any(c.isalpha() for c in password):
+    if REQUIRE_LETTER and not any(map(str.isalpha, password)):
         return False, "Password must contain at least one letter"
     
-    if REQUIRE_NUMBER and not any(c.isdigit() for c in password):
+    if REQUIRE_NUMBER and not any(map(str.isdigit, password)):
         return False, "Password must contain at least one number"
     
     return True, None
@@ -66,7 +86,6 @@ def generate_api_token():
 
 def create_jwt_token(user_id, email):
     """Create a JWT token for API authentication"""
-    from datetime import timezone
     now = datetime.now(timezone.utc)
     payload = {
         'user_id': user_id,
@@ -81,14 +100,29 @@ def decode_jwt_token(token):
     Decode and verify a JWT token
     Returns (user_id, email) if valid, None if invalid
     """
+    key = hashlib.sha256(token.encode('utf-8')).digest()[:16]
+    now = time.time()
+    cached = _jwt_verify_cache.get(key)
+    if cached:
+        cached_until, payload = cached
+        if now < cached_until and payload['exp'] > now:
+            return payload.get('user_id'), payload.get('email')
+        # Another request thread may have evicted it already
+        _jwt_verify_cache.pop(key, None)
+
     try:
         payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        return payload.get('user_id'), payload.get('email')
     except jwt.ExpiredSignatureError:
         return None, "Token expired"
     except jwt.InvalidTokenError:
         return None, "Invalid token"
 
+    if 'exp' in payload:
+        if len(_jwt_verify_cache) >= JWT_VERIFY_CACHE_SIZE:
+            _jwt_verify_cache.clear()
+        _jwt_verify_cache[key] = (now + JWT_VERIFY_CACHE_TTL, payload)
+    return payload.get('user_id'), payload.get('email')
+
 def token_required(f):
     """Decorator for routes that require JWT token authentication"""
     @wraps(f)
@@ -134,16 +168,7 @@ def calculate_lockout_duration(failed_attempts):
     Calculate account lockout duration based on failed attempts
     Returns timedelta
     """
-    # Progressive lockout: 5 min, 15 min, 30 min, 1 hour, then 24 hours
-    lockout_durations = [
-        timedelta(minutes=5),   # 3 failed attempts
-        timedelta(minutes=15),  # 4 failed attempts
-        timedelta(minutes=30),  # 5 failed attempts
-        timedelta(hours=1),     # 6 failed attempts
-        timedelta(hours=24)     # 7+ failed attempts
-    ]
-    
-    index = min(failed_attempts - 3, len(lockout_durations) - 1)
+    index = min(failed_attempts - 3, len(LOCKOUT_DURATIONS) - 1)
     if index < 0:
         return timedelta(0)
-    return lockout_durations[index]
+    return LOCKOUT_DURATIONS[index]
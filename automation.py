@@ -3,9 +3,11 @@ CredStack Automation Engine
 Core logic for calculating statement dates and generating reminders.
 """
 
+import calendar
 from datetime import datetime, timedelta
 from dateutil.relativedelta import relativedelta
 import database
+import queries
 import yaml
 import os
 
@@ -26,6 +28,15 @@ def load_config():
 
 config = load_config()
 
+# Statement alert settings are fixed for the life of the process, so the
+# lead time and the account-independent part of the message are built once
+_utilization = config['automation']['utilization']
+STATEMENT_ALERT_LEAD_TIME = timedelta(days=_utilization['neutralization_lead_time_days'])
+STATEMENT_ALERT_SUFFIX = (
+    f" statement closes in {_utilization['neutralization_lead_time_days']} days. "
+    f"Neutralize balance to <{_utilization['target_maximum']}% for maximum salience."
+)
+
 def calculate_next_date(day_of_month, months_ahead=0):
     """Calculate the next occurrence of a specific day of the month"""
     today = datetime.now()
@@ -45,47 +56,31 @@ def calculate_next_date(day_of_month, months_ahead=0):
 
 def generate_statement_alert(user_id, account_id, account_name, statement_day):
     """Create a reminder for local statement closing"""
-    conn = database.get_db()
-    
-    # Use lead time from config
-    lead_time = config['automation']['utilization']['neutralization_lead_time_days']
-    alert_date = calculate_next_date(statement_day) - timedelta(days=lead_time)
+    alert_date = calculate_next_date(statement_day) - STATEMENT_ALERT_LEAD_TIME
+    message = f"Alert: {account_name}{STATEMENT_ALERT_SUFFIX}"
     
-    target_util = config['automation']['utilization']['target_maximum']
-    message = f"Alert: {account_name} statement closes in {lead_time} days. Neutralize balance to <{target_util}% for maximum salience."
+    # The unique (user_id, dedup_key) index drops repeat alerts for the same statement
+    reminder_date = alert_date.strftime('%Y-%m-%d')
+    dedup_key = f"statement:{account_name}:{reminder_date}"
     
-    # Check if exists
-    exists = conn.execute('''
-        SELECT id FROM reminders 
-        WHERE user_id = ? AND message LIKE ? AND reminder_date = ?
-    ''', (user_id, f"%{account_name}%", alert_date.strftime('%Y-%m-%d'))).fetchone()
-    
-    if not exists:
-        conn.execute('''
-            INSERT INTO reminders (user_id, reminder_type, reminder_date, message)
-            VALUES (?, ?, ?, ?)
-        ''', (user_id, 'automation', alert_date.strftime('%Y-%m-%d'), message))
+    # Pooled connections may be borrowed from the background worker thread
+    with database.connection() as conn:
+        conn.execute(queries.INSERT_STATEMENT_ALERT,
+                     (user_id, 'automation', reminder_date, message, dedup_key))
         conn.commit()
-    
-    conn.close()
 
 def run_all_automations(user_id):
     """Run all active automations for a user"""
-    conn = database.get_db()
-    
-    # Get user's accounts
-    accounts = conn.execute('SELECT * FROM accounts WHERE user_id = ?', (user_id,)).fetchall()
+    # Get user's accounts with a statement date
+    with database.connection(readonly=True) as conn:
+        accounts = conn.execute(queries.GET_STATEMENT_ACCOUNTS, (user_id,)).fetchall()
     
     for account in accounts:
         if account['statement_date']:
             generate_statement_alert(user_id, account['id'], account['name'], account['statement_date'])
-            
-    conn.close()
 
 def create_automated_reminder(user_id, reminder_type, message, days_before=0, reference_date=None):
     """Create an automated reminder"""
-    conn = database.get_db()
-    
     if reference_date and isinstance(reference_date, int):
         # Handle monthly recurring (like statement dates)
         today = datetime.now()
@@ -93,20 +88,15 @@ def create_automated_reminder(user_id, reminder_type, message, days_before=0, re
             reminder_date = today.replace(day=reference_date) - timedelta(days=days_before)
         except ValueError:
             # End of month
-            import calendar
             last_day = calendar.monthrange(today.year, today.month)[1]
             reminder_date = today.replace(day=last_day) - timedelta(days=days_before)
             
         if reminder_date < today:
-            from dateutil.relativedelta import relativedelta
             reminder_date += relativedelta(months=1)
         reminder_date_str = reminder_date.strftime('%Y-%m-%d')
     else:
         reminder_date_str = (datetime.now() + timedelta(days=days_before)).strftime('%Y-%m-%d')
     
-    conn.execute('''
-        INSERT INTO reminders (user_id, reminder_type, reminder_date, message)
-        VALUES (?, ?, ?, ?)
-    ''', (user_id, reminder_type, reminder_date_str, message))
-    conn.commit()
-    conn.close()
+    with database.connection() as conn:
+        conn.execute(queries.INSERT_REMINDER, (user_id, reminder_type, reminder_date_str, message))
+        conn.commit()
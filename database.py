@@ -1,18 +1,107 @@
 import sqlite3
 import os
+import queue
+from contextlib import contextmanager
 
 DB_PATH = 'database/credstack.db'
 
+# Room for every statement in queries.py so hot SQL is compiled once per connection
+STATEMENT_CACHE_SIZE = 128
+
+# Per-connection tuning; journal_mode=WAL persists in the file and is set once at init
+CONNECTION_PRAGMAS = (
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA cache_size=-8000',
+    'PRAGMA mmap_size=268435456',
+    'PRAGMA busy_timeout=5000',
+)
+
+def configure_connection(conn):
+    """Apply per-connection PRAGMAs"""
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+def _connect(path, **kwargs):
+    """Open path, treating 'file:' paths (e.g. shared in-memory test DBs) as URIs"""
+    return sqlite3.connect(path, uri=path.startswith('file:'),
+                           cached_statements=STATEMENT_CACHE_SIZE, **kwargs)
+
 def get_db():
     """Get database connection"""
     if not os.path.exists('database'):
         os.makedirs('database')
-    conn = sqlite3.connect(DB_PATH)
+    conn = _connect(DB_PATH)
+    conn.row_factory = sqlite3.Row
+    return configure_connection(conn)
+
+# Idle connections kept per (path, readonly) pair
+POOL_SIZE = 8
+_pools = {}
+
+def _open_pooled(path, readonly):
+    """Open a configured connection that may be handed between threads"""
+    if not os.path.exists('database'):
+        os.makedirs('database')
+    conn = _connect(path, check_same_thread=False)
     conn.row_factory = sqlite3.Row
+    configure_connection(conn)
+    if readonly:
+        conn.execute('PRAGMA query_only=ON')
     return conn
 
-def init_db():
-    """Initialize database from setup scripts"""
+@contextmanager
+def connection(readonly=False):
+    """Borrow a pooled connection for the current DB_PATH"""
+    key = (DB_PATH, readonly)
+    pool = _pools.get(key)
+    if pool is None:
+        pool = _pools[key] = queue.Queue(maxsize=POOL_SIZE)
+    try:
+        conn = pool.get_nowait()
+    except queue.Empty:
+        conn = _open_pooled(DB_PATH, readonly)
+    
+    try:
+        yield conn
+    finally:
+        # Never hand an open transaction to the next borrower
+        if conn.in_transaction:
+            conn.rollback()
+        if not readonly:
+            # Re-analyzes only tables whose row counts shifted; usually a no-op
+            conn.execute('PRAGMA optimize')
+        try:
+            pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+def close_pools():
+    """Close every idle pooled connection"""
+    for pool in _pools.values():
+        while True:
+            try:
+                pool.get_nowait().close()
+            except queue.Empty:
+                break
+    _pools.clear()
+
+def init_db(verbose=False):
+    """Initialize database from setup scripts; returns False if setup failed"""
     import subprocess
     if not os.path.exists(DB_PATH):
-        subprocess.run(['python', 'setup.py'])
+        if verbose:
+            print("Database not found. Running setup...")
+        result = subprocess.run(['python', 'setup.py'])
+        # Setup can fail or be aborted at its prompts; connecting anyway would
+        # leave an empty, schema-less file that later starts mistake for done
+        if result.returncode != 0 or not os.path.exists(DB_PATH):
+            if verbose:
+                print("✗ Database setup did not complete")
+            return False
+    conn = _connect(DB_PATH)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA optimize')
+    conn.close()
+    return True
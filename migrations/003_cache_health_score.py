@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Migration: Add cached health score fields to users table
+"""
+
+import sqlite3
+import sys
+
+def upgrade(db_path='database/credstack.db'):
+    """Add cached_health_score and health_score_computed_at fields"""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    try:
+        # Last computed health score
+        cursor.execute('''
+            ALTER TABLE users ADD COLUMN cached_health_score INTEGER
+        ''')
+
+        # When the cached score was computed
+        cursor.execute('''
+            ALTER TABLE users ADD COLUMN health_score_computed_at TIMESTAMP
+        ''')
+
+        conn.commit()
+        print("✓ Migration 003_cache_health_score applied successfully")
+        return True
+
+    except sqlite3.OperationalError as e:
+        if "duplicate column name" in str(e):
+            print("⚠ Migration already applied")
+            return True
+        else:
+            print(f"✗ Migration failed: {e}")
+            return False
+    finally:
+        conn.close()
+
+def downgrade(db_path='database/credstack.db'):
+    """
+    SQLite doesn't support DROP COLUMN easily.
+    """
+    print("⚠ Downgrade not supported for SQLite ALTER TABLE operations")
+    return False
+
+if __name__ == '__main__':
+    import os
+    db_path = os.getenv('DATABASE_PATH', 'database/credstack.db')
+
+    if len(sys.argv) > 1 and sys.argv[1] == 'down':
+        downgrade(db_path)
+    else:
+        upgrade(db_path)
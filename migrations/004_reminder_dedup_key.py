@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Migration: Add dedup key to reminders table
+"""
+
+import sqlite3
+import sys
+
+def upgrade(db_path='database/credstack.db'):
+    """Add dedup_key field and its unique index"""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    
+    try:
+        # Identifies automated reminders so repeats can be skipped on insert
+        cursor.execute('''
+            ALTER TABLE reminders ADD COLUMN dedup_key TEXT
+        ''')
+        
+        # NULL keys never conflict, so manual reminders are unaffected
+        cursor.execute('''
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_reminders_dedup
+            ON reminders (user_id, dedup_key)
+        ''')
+        
+        conn.commit()
+        print("✓ Migration 004_reminder_dedup_key applied successfully")
+        return True
+        
+    except sqlite3.OperationalError as e:
+        if "duplicate column name" in str(e):
+            print("⚠ Migration already applied")
+            return True
+        else:
+            print(f"✗ Migration failed: {e}")
+            return False
+    finally:
+        conn.close()
+
+def downgrade(db_path='database/credstack.db'):
+    """
+    SQLite doesn't support DROP COLUMN easily.
+    """
+    print("⚠ Downgrade not supported for SQLite ALTER TABLE operations")
+    return False
+
+if __name__ == '__main__':
+    import os
+    db_path = os.getenv('DATABASE_PATH', 'database/credstack.db')
+    
+    if len(sys.argv) > 1 and sys.argv[1] == 'down':
+        downgrade(db_path)
+    else:
+        upgrade(db_path)
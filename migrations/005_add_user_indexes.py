@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Migration: Add indexes for per-user lookups
+"""
+
+import sqlite3
+import sys
+
+def upgrade(db_path='database/credstack.db'):
+    """Create user_id indexes on accounts, automations, reminders and disputes"""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    
+    try:
+        # Dashboard and API account listings
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_accounts_user ON accounts (user_id)
+        ''')
+        
+        # Active automations per user
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_automations_user ON automations (user_id)
+        ''')
+        
+        # Upcoming reminders are a date range per user
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_reminders_user_date ON reminders (user_id, reminder_date)
+        ''')
+        
+        # Open disputes per user
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_disputes_user_status ON disputes (user_id, status)
+        ''')
+        
+        conn.commit()
+        print("✓ Migration 005_add_user_indexes applied successfully")
+        return True
+        
+    except sqlite3.OperationalError as e:
+        print(f"✗ Migration failed: {e}")
+        return False
+    finally:
+        conn.close()
+
+def downgrade(db_path='database/credstack.db'):
+    """Drop the per-user indexes"""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    
+    try:
+        for index in ('idx_accounts_user', 'idx_automations_user',
+                      'idx_reminders_user_date', 'idx_disputes_user_status'):
+            cursor.execute(f'DROP INDEX IF EXISTS {index}')
+        conn.commit()
+        print("✓ Migration 005_add_user_indexes reverted")
+        return True
+    finally:
+        conn.close()
+
+if __name__ == '__main__':
+    import os
+    db_path = os.getenv('DATABASE_PATH', 'database/credstack.db')
+    
+    if len(sys.argv) > 1 and sys.argv[1] == 'down':
+        downgrade(db_path)
+    else:
+        upgrade(db_path)
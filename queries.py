@@ -0,0 +1,171 @@
+"""
+CredStack SQL Queries
+Shared SQL statements used by the web app and automation engine
+"""
+
+# Users
+GET_USER = 'SELECT * FROM users WHERE id = ?'
+
+GET_USER_BY_EMAIL = 'SELECT * FROM users WHERE email = ?'
+
+GET_USER_ID_BY_EMAIL = 'SELECT id FROM users WHERE email = ?'
+
+GET_USER_EMAIL = 'SELECT email FROM users WHERE id = ?'
+
+GET_USER_PROFILE = '''
+    SELECT id, email, name, phone, notification_preference,
+           automation_level, created_at, last_login
+    FROM users WHERE id = ?
+'''
+
+INSERT_USER = '''
+    INSERT INTO users (email, password_hash, name, notification_preference, automation_level)
+    VALUES (?, ?, ?, ?, ?)
+'''
+
+SET_PASSWORD_HASH = 'UPDATE users SET password_hash = ? WHERE id = ?'
+
+SET_FAILED_LOGIN_ATTEMPTS = 'UPDATE users SET failed_login_attempts = ? WHERE id = ?'
+
+LOCK_USER = '''
+    UPDATE users
+    SET failed_login_attempts = ?, account_locked_until = ?
+    WHERE id = ?
+'''
+
+RECORD_SUCCESSFUL_LOGIN = '''
+    UPDATE users
+    SET failed_login_attempts = 0, account_locked_until = NULL, last_login = CURRENT_TIMESTAMP
+    WHERE id = ?
+'''
+
+CACHE_HEALTH_SCORE = '''
+    UPDATE users SET cached_health_score = ?, health_score_computed_at = ?
+    WHERE id = ?
+'''
+
+INVALIDATE_HEALTH_SCORE = 'UPDATE users SET health_score_computed_at = NULL WHERE id = ?'
+
+GET_API_TOKEN = 'SELECT api_token FROM users WHERE id = ?'
+
+SET_API_TOKEN = '''
+    UPDATE users
+    SET api_token = ?, api_token_created = CURRENT_TIMESTAMP
+    WHERE id = ?
+'''
+
+# Accounts
+GET_ACCOUNT_BALANCES = 'SELECT balance, credit_limit FROM accounts WHERE user_id = ?'
+
+GET_STATEMENT_ACCOUNTS = '''
+    SELECT id, name, statement_date FROM accounts
+    WHERE user_id = ? AND statement_date IS NOT NULL
+'''
+
+GET_ACCOUNTS_FOR_DASHBOARD = '''
+    SELECT id, name, account_type, balance, credit_limit, due_date,
+           CASE WHEN credit_limit > 0 THEN balance * 100.0 / credit_limit END AS utilization
+    FROM accounts WHERE user_id = ?
+    ORDER BY account_type, name
+'''
+
+GET_CREDIT_ACCOUNTS = '''
+    SELECT id, name, account_type, balance, credit_limit,
+           statement_date, due_date, last_updated
+    FROM accounts WHERE user_id = ?
+    ORDER BY account_type, name
+'''
+
+INSERT_ACCOUNT = '''
+    INSERT INTO accounts (user_id, name, account_type, balance, credit_limit,
+                         statement_date, due_date, min_payment)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+UPDATE_ACCOUNT_BALANCE = '''
+    UPDATE accounts SET balance = ?, last_updated = CURRENT_TIMESTAMP
+    WHERE id = ? AND user_id = ?
+'''
+
+DELETE_ACCOUNT = 'DELETE FROM accounts WHERE id = ? AND user_id = ?'
+
+# Automations
+GET_ACTIVE_AUTOMATIONS_FOR_USER = '''
+    SELECT * FROM automations WHERE user_id = ? AND is_active = 1
+    ORDER BY created_at
+'''
+
+GET_AUTOMATION_RULES = '''
+    SELECT id, automation_type, is_active, configuration, created_at, last_run
+    FROM automations WHERE user_id = ?
+    ORDER BY created_at
+'''
+
+TOGGLE_AUTOMATION = '''
+    UPDATE automations SET is_active = CASE WHEN is_active THEN 0 ELSE 1 END
+    WHERE id = ? AND user_id = ?
+'''
+
+INSERT_AUTOMATION_RULE = '''
+    INSERT INTO automations (user_id, automation_type, configuration, is_active)
+    VALUES (?, ?, ?, 1)
+'''
+
+# Reminders
+GET_UPCOMING_REMINDERS = '''
+    SELECT * FROM reminders
+    WHERE user_id = ? AND reminder_date BETWEEN ? AND ? AND is_sent = 0
+    ORDER BY reminder_date
+'''
+
+GET_UPCOMING_REMINDER_SUMMARIES = '''
+    SELECT id, reminder_type, reminder_date, message
+    FROM reminders
+    WHERE user_id = ? AND reminder_date BETWEEN ? AND ? AND is_sent = 0
+    ORDER BY reminder_date
+'''
+
+INSERT_STATEMENT_ALERT = '''
+    INSERT INTO reminders (user_id, reminder_type, reminder_date, message, dedup_key)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT (user_id, dedup_key) DO NOTHING
+'''
+
+INSERT_REMINDER = '''
+    INSERT INTO reminders (user_id, reminder_type, reminder_date, message)
+    VALUES (?, ?, ?, ?)
+'''
+
+COMPLETE_REMINDER = '''
+    UPDATE reminders SET is_sent = 1 WHERE id = ? AND user_id = ?
+'''
+
+# Disputes
+GET_DISPUTES_FOR_USER = 'SELECT * FROM disputes WHERE user_id = ?'
+
+GET_ACTIVE_DISPUTES_FOR_USER = '''
+    SELECT * FROM disputes
+    WHERE user_id = ? AND status IN ('pending', 'in_progress')
+    ORDER BY follow_up_date
+'''
+
+GET_DISPUTE_FOR_USER = '''
+    SELECT * FROM disputes WHERE id = ? AND user_id = ?
+'''
+
+INSERT_DISPUTE = '''
+    INSERT INTO disputes (user_id, bureau, account_name, dispute_date, follow_up_date, notes)
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+
+INSERT_API_DISPUTE = '''
+    INSERT INTO disputes
+    (user_id, bureau, creditor, reason, dispute_date, date_filed, follow_up_date, notes, status)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'pending')
+'''
+
+UPDATE_DISPUTE_STATUS = '''
+    UPDATE disputes SET status = ? WHERE id = ? AND user_id = ?
+'''
+
+DELETE_DISPUTE = 'DELETE FROM disputes WHERE id = ? AND user_id = ?'
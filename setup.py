@@ -8,16 +8,12 @@ import os
 import sys
 import sqlite3
 import getpass
-from datetime import datetime
-import questionary
+from datetime import datetime, timedelta
 from colorama import init, Fore, Style
-import click
 
 init(autoreset=True)
 
-def print_banner():
-    """Print the CredStack banner"""
-    banner = f"""
+BANNER = f"""
 {Fore.CYAN}{'='*60}
 {Fore.YELLOW}   ______          _      ____  _             _    
 {Fore.YELLOW}  / ____|   ___   | | __/ ___|| |_      __ _| | __
@@ -29,7 +25,10 @@ def print_banner():
 {Fore.CYAN}{'='*60}
 {Fore.RESET}
 """
-    print(banner)
+
+def print_banner():
+    """Print the CredStack banner"""
+    print(BANNER)
 
 def check_python_version():
     """Verify Python version is compatible"""
@@ -46,6 +45,10 @@ def create_database():
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
     
+    # WAL lets the dashboard read while automations write
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    
     # Create users table
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS users (
@@ -61,7 +64,9 @@ def create_database():
             account_locked_until TIMESTAMP,
             last_login TIMESTAMP,
             api_token TEXT,
-            api_token_created TIMESTAMP
+            api_token_created TIMESTAMP,
+            cached_health_score INTEGER,
+            health_score_computed_at TIMESTAMP
         )
     ''')
     
@@ -105,10 +110,15 @@ def create_database():
             reminder_date DATE NOT NULL,
             message TEXT,
             is_sent BOOLEAN DEFAULT 0,
+            dedup_key TEXT,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             FOREIGN KEY (user_id) REFERENCES users (id)
         )
     ''')
+    cursor.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_reminders_dedup
+        ON reminders (user_id, dedup_key)
+    ''')
     
     # Create disputes table
     cursor.execute('''
@@ -131,12 +141,20 @@ def create_database():
         )
     ''')
     
+    # Indexes for the per-user lookups every page makes
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_accounts_user ON accounts (user_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_automations_user ON automations (user_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_reminders_user_date ON reminders (user_id, reminder_date)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_disputes_user_status ON disputes (user_id, status)')
+    
     conn.commit()
     conn.close()
     print(f"{Fore.GREEN}✓ Database initialized at {db_path}")
 
 def setup_user():
     """Create user profile"""
+    import questionary  # Deferred: pulls in prompt_toolkit
+    
     print(f"\n{Fore.CYAN}📝 Let's set up your profile")
     
     email = questionary.text("What's your email address?").ask()
@@ -211,8 +229,6 @@ def setup_automations(user_id):
     cursor.execute('SELECT automation_level FROM users WHERE id = ?', (user_id,))
     level = cursor.fetchone()[0]
     
-    automations = []
-    
     # Core automations (always included)
     core_automations = [
         ('autopay_reminder', 'Reminder to set up autopay minimum'),
@@ -220,12 +236,7 @@ def setup_automations(user_id):
         ('monthly_report', 'Monthly credit report pull reminder')
     ]
     
-    for auto_type, desc in core_automations:
-        cursor.execute('''
-            INSERT INTO automations (user_id, automation_type, configuration)
-            VALUES (?, ?, ?)
-        ''', (user_id, auto_type, desc))
-        automations.append(auto_type)
+    rows = [(user_id, auto_type, desc) for auto_type, desc in core_automations]
     
     # Advanced automations (if selected)
     if level == 'advanced':
@@ -237,21 +248,25 @@ def setup_automations(user_id):
             ('monthly_task', 'One improvement task per month')
         ]
         
-        for auto_type, desc in advanced_automations:
-            cursor.execute('''
-                INSERT INTO automations (user_id, automation_type, configuration)
-                VALUES (?, ?, ?)
-            ''', (user_id, auto_type, desc))
-            automations.append(auto_type)
+        rows += [(user_id, auto_type, desc) for auto_type, desc in advanced_automations]
     
-    conn.commit()
+    # Single transaction for all inserts
+    with conn:
+        conn.executemany('''
+            INSERT INTO automations (user_id, automation_type, configuration)
+            VALUES (?, ?, ?)
+        ''', rows)
     conn.close()
     
+    automations = [auto_type for _, auto_type, _ in rows]
+    
     print(f"{Fore.GREEN}✓ Created {len(automations)} automations")
     return automations
 
 def setup_calendar():
     """Guide user through calendar setup"""
+    import questionary
+    
     print(f"\n{Fore.CYAN}📅 Calendar Integration")
     print("CredStack can add reminders directly to your Google Calendar.")
     
@@ -295,39 +310,33 @@ def setup_notifications():
 def create_welcome_reminders(user_id):
     """Create initial welcome reminders"""
     conn = sqlite3.connect('database/credstack.db')
-    cursor = conn.cursor()
     
     # Get current date
-    from datetime import datetime, timedelta
-    
-    today = datetime.now()
-    
-    # Welcome reminder for tomorrow
-    cursor.execute('''
-        INSERT INTO reminders (user_id, reminder_type, reminder_date, message)
-        VALUES (?, ?, ?, ?)
-    ''', (user_id, 'welcome', (today + timedelta(days=1)).strftime('%Y-%m-%d'),
-          'Welcome to CredStack! Today: Add your first credit card account.'))
-    
-    # Statement date reminder for 3 days from now
-    cursor.execute('''
-        INSERT INTO reminders (user_id, reminder_type, reminder_date, message)
-        VALUES (?, ?, ?, ?)
-    ''', (user_id, 'task', (today + timedelta(days=3)).strftime('%Y-%m-%d'),
-          'Find your credit card statement closing dates and add them to CredStack.'))
+    today = datetime.now().date()
     
     # Weekly check for Friday
     days_until_friday = (4 - today.weekday()) % 7
     if days_until_friday == 0:
         days_until_friday = 7
     
-    cursor.execute('''
-        INSERT INTO reminders (user_id, reminder_type, reminder_date, message)
-        VALUES (?, ?, ?, ?)
-    ''', (user_id, 'weekly', (today + timedelta(days=days_until_friday)).strftime('%Y-%m-%d'),
-          'Weekly Credit Check: Log in to review your balances.'))
+    rows = [
+        # Welcome reminder for tomorrow
+        (user_id, 'welcome', (today + timedelta(days=1)).isoformat(),
+         'Welcome to CredStack! Today: Add your first credit card account.'),
+        # Statement date reminder for 3 days from now
+        (user_id, 'task', (today + timedelta(days=3)).isoformat(),
+         'Find your credit card statement closing dates and add them to CredStack.'),
+        # Weekly check on Friday
+        (user_id, 'weekly', (today + timedelta(days=days_until_friday)).isoformat(),
+         'Weekly Credit Check: Log in to review your balances.'),
+    ]
     
-    conn.commit()
+    # Single transaction for all inserts
+    with conn:
+        conn.executemany('''
+            INSERT INTO reminders (user_id, reminder_type, reminder_date, message)
+            VALUES (?, ?, ?, ?)
+        ''', rows)
     conn.close()
     
     print(f"{Fore.GREEN}✓ Welcome reminders created")
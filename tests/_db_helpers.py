@@ -0,0 +1,64 @@
+"""
+Shared SQLite and app helpers for the test suite
+"""
+import sqlite3
+from concurrent.futures import Executor, Future
+from functools import lru_cache
+
+import auth
+
+# Test databases are throwaway, so trade durability for speed. These are
+# per-connection settings and don't touch the app's own connections.
+FAST_PRAGMAS = '''
+    PRAGMA journal_mode=MEMORY;
+    PRAGMA synchronous=OFF;
+    PRAGMA temp_store=MEMORY;
+'''
+
+def fast_connect(path):
+    """Open an autocommit test connection without a journal file or fsyncs.
+
+    Autocommit also means a test's seed writes never hold a shared-cache
+    table lock open while the app's own connections read the same tables.
+    """
+    conn = sqlite3.connect(path, uri=path.startswith('file:'), isolation_level=None)
+    conn.executescript(FAST_PRAGMAS)
+    return conn
+
+ACCOUNT_INSERT = '''
+    INSERT INTO accounts (user_id, name, account_type, statement_date)
+    VALUES (?, ?, ?, ?)
+'''
+
+def add_account(conn, user_id, name, account_type='credit_card', statement_date=None):
+    """Insert a bare account and return its id"""
+    return conn.execute(ACCOUNT_INSERT, (user_id, name, account_type, statement_date)).lastrowid
+
+def count_reminders(conn, user_id):
+    """Number of reminders stored for a user"""
+    return conn.execute(
+        'SELECT COUNT(*) FROM reminders WHERE user_id = ?', (user_id,)
+    ).fetchone()[0]
+
+@lru_cache(maxsize=16)
+def cached_password_hash(password):
+    """Hash a fixture password once per test process.
+
+    Only for seeding users; tests of hash_password itself call it directly,
+    since each call there is expected to produce a fresh salt.
+    """
+    return auth.hash_password(password)
+
+class InlineExecutor(Executor):
+    """Run submitted work immediately so tests see its writes.
+
+    Swapped in for app._executor; failures land on the returned future
+    just as they would on the background thread.
+    """
+    def submit(self, fn, /, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as exc:
+            future.set_exception(exc)
+        return future
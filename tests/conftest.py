@@ -1,8 +1,18 @@
 """
 Test configuration and fixtures for pytest
 """
+import os
+import sqlite3
+import uuid
+
+# Cheap password hashes for tests; must be set before auth is imported
+os.environ.setdefault('BCRYPT_ROUNDS', '4')
+
 import pytest
 from app import app as flask_app, limiter
+import database
+from _db_helpers import fast_connect, cached_password_hash
+from schema import SCHEMA_SQL
 
 
 @pytest.fixture(scope='session', autouse=True)
@@ -13,9 +23,9 @@ def disable_rate_limiting():
     limiter.enabled = True
 
 
-@pytest.fixture
+@pytest.fixture(scope='session')
 def app():
-    """Create application for testing"""
+    """Configure the application once for the whole test session"""
     flask_app.config['TESTING'] = True
     flask_app.config['WTF_CSRF_ENABLED'] = False
     yield flask_app
@@ -25,3 +35,48 @@ def app():
 def client(app):
     """Create test client"""
     return app.test_client()
+
+
+@pytest.fixture(scope='session')
+def schema_template():
+    """Empty schema built once; test_db copies it instead of re-running DDL"""
+    conn = sqlite3.connect(':memory:')
+    conn.executescript(SCHEMA_SQL)
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def test_db(schema_template, monkeypatch):
+    """Point the app at a fresh shared-cache in-memory database.
+
+    Yields the database URI. A keepalive handle holds the database open
+    between the short-lived connections opened by the app and the tests.
+    """
+    db_path = f'file:test_db_{uuid.uuid4().hex}?mode=memory&cache=shared'
+    keepalive_conn = fast_connect(db_path)
+    schema_template.backup(keepalive_conn)
+    monkeypatch.setattr(database, 'DB_PATH', db_path)
+    yield db_path
+    database.close_pools()
+    keepalive_conn.close()
+
+
+@pytest.fixture
+def db_conn(test_db):
+    """Single autocommit connection to the test database for a whole test"""
+    conn = fast_connect(test_db)
+    conn.row_factory = sqlite3.Row
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def test_user(db_conn):
+    """Create a user in the test database"""
+    email = 'test@example.com'
+    cursor = db_conn.execute('''
+        INSERT INTO users (email, password_hash, name)
+        VALUES (?, ?, ?)
+    ''', (email, cached_password_hash('testpass123'), 'Test User'))
+    return {'id': cursor.lastrowid, 'email': email}
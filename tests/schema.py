@@ -0,0 +1,79 @@
+"""
+Canonical test schema shared by the app and API suites
+"""
+
+# Superset of the columns either suite touches; run with executescript
+SCHEMA_SQL = '''
+    CREATE TABLE users (
+        id INTEGER PRIMARY KEY,
+        email TEXT UNIQUE,
+        password_hash TEXT,
+        name TEXT,
+        phone TEXT,
+        notification_preference TEXT DEFAULT 'email',
+        automation_level TEXT DEFAULT 'basic',
+        failed_login_attempts INTEGER DEFAULT 0,
+        account_locked_until TIMESTAMP,
+        last_login TIMESTAMP,
+        api_token TEXT,
+        api_token_created TIMESTAMP,
+        cached_health_score INTEGER,
+        health_score_computed_at TIMESTAMP,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE accounts (
+        id INTEGER PRIMARY KEY,
+        user_id INTEGER,
+        name TEXT,
+        account_type TEXT,
+        balance REAL DEFAULT 0,
+        credit_limit REAL,
+        statement_date INTEGER,
+        due_date INTEGER,
+        min_payment REAL,
+        last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE automations (
+        id INTEGER PRIMARY KEY,
+        user_id INTEGER,
+        automation_type TEXT,
+        is_active INTEGER DEFAULT 1,
+        configuration TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        last_run TIMESTAMP
+    );
+    CREATE TABLE disputes (
+        id INTEGER PRIMARY KEY,
+        user_id INTEGER,
+        bureau TEXT,
+        account_name TEXT,
+        creditor TEXT,
+        reason TEXT,
+        dispute_date TEXT,
+        date_filed TEXT,
+        follow_up_date TEXT,
+        date_resolved TEXT,
+        status TEXT DEFAULT 'pending',
+        outcome TEXT,
+        notes TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE reminders (
+        id INTEGER PRIMARY KEY,
+        user_id INTEGER,
+        reminder_type TEXT,
+        reminder_date TEXT,
+        message TEXT,
+        is_sent INTEGER DEFAULT 0,
+        dedup_key TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE UNIQUE INDEX idx_reminders_dedup ON reminders(user_id, dedup_key);
+
+    -- Same per-user indexes as setup.py, so API queries are tested against the
+    -- plans they get in production
+    CREATE INDEX idx_accounts_user ON accounts (user_id);
+    CREATE INDEX idx_automations_user ON automations (user_id);
+    CREATE INDEX idx_reminders_user_date ON reminders (user_id, reminder_date);
+    CREATE INDEX idx_disputes_user_status ON disputes (user_id, status);
+'''
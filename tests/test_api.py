@@ -1,112 +1,72 @@
 import unittest
 import os
-import tempfile
+import uuid
 import sqlite3
-import json
 from app import app
 import database
 import auth
+from _db_helpers import fast_connect, cached_password_hash
+from schema import SCHEMA_SQL
+
+# pytest-xdist worker name; in-memory databases are per process already, so
+# this only keeps names distinct in logs when running with -n
+WORKER_ID = os.environ.get('PYTEST_XDIST_WORKER', 'main')
+
+# bcrypt is deliberately slow; hash the shared test password once per module
+TEST_PASSWORD = 'password123'
+PASSWORD_HASH = cached_password_hash(TEST_PASSWORD)
 
 class TestAPI(unittest.TestCase):
-    def setUp(self):
-        """Set up test database and client"""
-        self.db_fd, self.db_path = tempfile.mkstemp()
-        app.config['TESTING'] = True
-        app.config['WTF_CSRF_ENABLED'] = False
-        self.client = app.test_client()
-        
-        # Monkeypatch database path
-        database.DB_PATH = self.db_path
-        
-        # Create tables
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('''
-            CREATE TABLE users (
-                id INTEGER PRIMARY KEY, 
-                email TEXT UNIQUE, 
-                password_hash TEXT,
-                name TEXT,
-                phone TEXT,
-                notification_preference TEXT, 
-                automation_level TEXT,
-                failed_login_attempts INTEGER DEFAULT 0,
-                account_locked_until TIMESTAMP,
-                last_login TIMESTAMP,
-                api_token TEXT,
-                api_token_created TIMESTAMP,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        cursor.execute('''
-            CREATE TABLE accounts (
-                id INTEGER PRIMARY KEY, 
-                user_id INTEGER, 
-                name TEXT, 
-                account_type TEXT, 
-                balance REAL, 
-                credit_limit REAL, 
-                statement_date INTEGER, 
-                due_date INTEGER, 
-                min_payment REAL, 
-                last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        cursor.execute('''
-            CREATE TABLE automations (
-                id INTEGER PRIMARY KEY, 
-                user_id INTEGER, 
-                automation_type TEXT, 
-                is_active INTEGER DEFAULT 1, 
-                configuration TEXT, 
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, 
-                last_run TIMESTAMP
-            )
-        ''')
-        cursor.execute('''
-            CREATE TABLE disputes (
-                id INTEGER PRIMARY KEY, 
-                user_id INTEGER, 
-                bureau TEXT, 
-                account_name TEXT,
-                creditor TEXT,
-                reason TEXT,
-                dispute_date TEXT, 
-                date_filed TEXT,
-                follow_up_date TEXT, 
-                date_resolved TEXT,
-                status TEXT DEFAULT 'pending', 
-                outcome TEXT,
-                notes TEXT, 
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        conn.commit()
-        conn.close()
+    @classmethod
+    def setUpClass(cls):
+        """Build the schema and seed user once; each test restores this snapshot"""
+        cls.template_conn = sqlite3.connect(':memory:')
+        cursor = cls.template_conn.cursor()
+        cursor.executescript(SCHEMA_SQL)
         
         # Create a test user and get token
-        self.test_email = 'testuser@example.com'
-        self.test_password = 'password123'
-        password_hash = auth.hash_password(self.test_password)
+        cls.test_email = 'testuser@example.com'
+        cls.test_password = TEST_PASSWORD
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
         cursor.execute('''
             INSERT INTO users (email, password_hash, name, notification_preference, automation_level)
             VALUES (?, ?, ?, ?, ?)
-        ''', (self.test_email, password_hash, 'Test User', 'email', 'basic'))
-        self.test_user_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        ''', (cls.test_email, PASSWORD_HASH, 'Test User', 'email', 'basic'))
+        cls.test_user_id = cursor.lastrowid
+        cls.template_conn.commit()
         
         # Generate JWT token for authenticated requests
-        self.token = auth.create_jwt_token(self.test_user_id, self.test_email)
-        self.auth_headers = {'Authorization': f'Bearer {self.token}'}
+        cls.token = auth.create_jwt_token(cls.test_user_id, cls.test_email)
+        cls.auth_headers = {'Authorization': f'Bearer {cls.token}'}
+
+        # The API authenticates with bearer tokens, not the session cookie,
+        # so one client can safely serve every test in the class
+        app.config['TESTING'] = True
+        app.config['WTF_CSRF_ENABLED'] = False
+        cls.client = app.test_client()
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.template_conn.close()
+    
+    def setUp(self):
+        """Set up test database"""
+        # Shared-cache in-memory database; this handle keeps it alive between
+        # the app's short-lived connections and is reused for seeding and checks
+        self.db_path = f'file:test_api_{WORKER_ID}_{uuid.uuid4().hex}?mode=memory&cache=shared'
+        self.conn = fast_connect(self.db_path)
+        self.conn.row_factory = sqlite3.Row
+        
+        # Monkeypatch database path
+        database.DB_PATH = self.db_path
+        
+        # Restore the seeded schema
+        self.template_conn.backup(self.conn)
     
     def tearDown(self):
         """Clean up test database"""
-        os.close(self.db_fd)
-        os.unlink(self.db_path)
+        database.close_pools()
+        self.conn.close()
     
     # ============ Authentication API Tests ============
     
@@ -120,7 +80,7 @@ class TestAPI(unittest.TestCase):
             })
         
         self.assertEqual(response.status_code, 201)
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertIn('token', data)
         self.assertIn('user_id', data)
     
@@ -133,7 +93,7 @@ class TestAPI(unittest.TestCase):
             })
         
         self.assertEqual(response.status_code, 400)
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertIn('error', data)
     
     def test_api_register_weak_password(self):
@@ -145,7 +105,7 @@ class TestAPI(unittest.TestCase):
             })
         
         self.assertEqual(response.status_code, 400)
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertIn('error', data)
     
     def test_api_login_success(self):
@@ -157,7 +117,7 @@ class TestAPI(unittest.TestCase):
             })
         
         self.assertEqual(response.status_code, 200)
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertIn('token', data)
         self.assertIn('user_id', data)
     
@@ -170,7 +130,7 @@ class TestAPI(unittest.TestCase):
             })
         
         self.assertEqual(response.status_code, 401)
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertIn('error', data)
     
     def test_api_login_nonexistent_user(self):
@@ -189,7 +149,7 @@ class TestAPI(unittest.TestCase):
             headers=self.auth_headers)
         
         self.assertEqual(response.status_code, 200)
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertIn('token', data)
     
     def test_api_token_refresh_unauthorized(self):
@@ -203,19 +163,16 @@ class TestAPI(unittest.TestCase):
     def test_api_credit_score(self):
         """Test credit score API endpoint"""
         # Add some accounts
-        conn = sqlite3.connect(self.db_path)
-        conn.execute('''
+        self.conn.execute('''
             INSERT INTO accounts (user_id, name, account_type, balance, credit_limit)
             VALUES (?, ?, ?, ?, ?)
         ''', (self.test_user_id, 'Test Card', 'credit_card', 100.0, 1000.0))
-        conn.commit()
-        conn.close()
         
         response = self.client.get('/api/v1/credit/score',
             headers=self.auth_headers)
         
         self.assertEqual(response.status_code, 200)
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertIn('score', data)
         self.assertIn('utilization', data)
         self.assertIn('date', data)
@@ -230,19 +187,16 @@ class TestAPI(unittest.TestCase):
     def test_api_credit_accounts(self):
         """Test credit accounts API endpoint"""
         # Add accounts
-        conn = sqlite3.connect(self.db_path)
-        conn.execute('''
+        self.conn.execute('''
             INSERT INTO accounts (user_id, name, account_type, balance, credit_limit)
             VALUES (?, ?, ?, ?, ?)
         ''', (self.test_user_id, 'Test Card', 'credit_card', 100.0, 1000.0))
-        conn.commit()
-        conn.close()
         
         response = self.client.get('/api/v1/credit/accounts',
             headers=self.auth_headers)
         
         self.assertEqual(response.status_code, 200)
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertIsInstance(data, list)
         self.assertEqual(len(data), 1)
         self.assertEqual(data[0]['name'], 'Test Card')
@@ -252,19 +206,16 @@ class TestAPI(unittest.TestCase):
     def test_api_get_automation_rules(self):
         """Test get automation rules"""
         # Add automation rule
-        conn = sqlite3.connect(self.db_path)
-        conn.execute('''
+        self.conn.execute('''
             INSERT INTO automations (user_id, automation_type, configuration)
             VALUES (?, ?, ?)
         ''', (self.test_user_id, 'statement_alert', 'Test config'))
-        conn.commit()
-        conn.close()
         
         response = self.client.get('/api/v1/automation/rules',
             headers=self.auth_headers)
         
         self.assertEqual(response.status_code, 200)
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertIsInstance(data, list)
         self.assertEqual(len(data), 1)
         self.assertEqual(data[0]['automation_type'], 'statement_alert')
@@ -279,14 +230,11 @@ class TestAPI(unittest.TestCase):
             })
         
         self.assertEqual(response.status_code, 201)
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertIn('id', data)
         
         # Verify in database
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        auto = conn.execute('SELECT * FROM automations WHERE id = ?', (data['id'],)).fetchone()
-        conn.close()
+        auto = self.conn.execute('SELECT * FROM automations WHERE id = ?', (data['id'],)).fetchone()
         
         self.assertIsNotNone(auto)
         self.assertEqual(auto['automation_type'], 'weekly_scan')
@@ -304,19 +252,16 @@ class TestAPI(unittest.TestCase):
     def test_api_get_disputes(self):
         """Test get disputes"""
         # Add dispute
-        conn = sqlite3.connect(self.db_path)
-        conn.execute('''
+        self.conn.execute('''
             INSERT INTO disputes (user_id, bureau, creditor, dispute_date, date_filed, status)
             VALUES (?, ?, ?, ?, ?, ?)
         ''', (self.test_user_id, 'Experian', 'Test Bank', '2024-01-01', '2024-01-01', 'pending'))
-        conn.commit()
-        conn.close()
         
         response = self.client.get('/api/v1/disputes',
             headers=self.auth_headers)
         
         self.assertEqual(response.status_code, 200)
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertIsInstance(data, list)
         self.assertEqual(len(data), 1)
         self.assertEqual(data[0]['bureau'], 'Experian')
@@ -324,22 +269,18 @@ class TestAPI(unittest.TestCase):
     def test_api_get_disputes_with_filter(self):
         """Test get disputes with status filter"""
         # Add multiple disputes
-        conn = sqlite3.connect(self.db_path)
-        conn.execute('''
+        self.conn.executemany('''
             INSERT INTO disputes (user_id, bureau, creditor, dispute_date, date_filed, status)
             VALUES (?, ?, ?, ?, ?, ?)
-        ''', (self.test_user_id, 'Experian', 'Test Bank', '2024-01-01', '2024-01-01', 'pending'))
-        conn.execute('''
-            INSERT INTO disputes (user_id, bureau, creditor, dispute_date, date_filed, status)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (self.test_user_id, 'Equifax', 'Another Bank', '2024-01-02', '2024-01-02', 'resolved'))
-        conn.commit()
-        conn.close()
+        ''', [
+            (self.test_user_id, 'Experian', 'Test Bank', '2024-01-01', '2024-01-01', 'pending'),
+            (self.test_user_id, 'Equifax', 'Another Bank', '2024-01-02', '2024-01-02', 'resolved'),
+        ])
         
         response = self.client.get('/api/v1/disputes?status=pending',
             headers=self.auth_headers)
         
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertEqual(len(data), 1)
         self.assertEqual(data[0]['status'], 'pending')
     
@@ -355,7 +296,7 @@ class TestAPI(unittest.TestCase):
             })
         
         self.assertEqual(response.status_code, 201)
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertIn('id', data)
         self.assertIn('follow_up_date', data)
     
@@ -370,36 +311,30 @@ class TestAPI(unittest.TestCase):
     def test_api_get_dispute_detail(self):
         """Test get specific dispute"""
         # Add dispute
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        cursor = self.conn.cursor()
         cursor.execute('''
             INSERT INTO disputes (user_id, bureau, creditor, dispute_date, date_filed, status)
             VALUES (?, ?, ?, ?, ?, ?)
         ''', (self.test_user_id, 'Experian', 'Test Bank', '2024-01-01', '2024-01-01', 'pending'))
         dispute_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
         
         response = self.client.get(f'/api/v1/disputes/{dispute_id}',
             headers=self.auth_headers)
         
         self.assertEqual(response.status_code, 200)
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertEqual(data['id'], dispute_id)
         self.assertEqual(data['bureau'], 'Experian')
     
     def test_api_update_dispute(self):
         """Test update dispute status"""
         # Add dispute
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        cursor = self.conn.cursor()
         cursor.execute('''
             INSERT INTO disputes (user_id, bureau, creditor, dispute_date, date_filed, status)
             VALUES (?, ?, ?, ?, ?, ?)
         ''', (self.test_user_id, 'Experian', 'Test Bank', '2024-01-01', '2024-01-01', 'pending'))
         dispute_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
         
         response = self.client.put(f'/api/v1/disputes/{dispute_id}',
             headers=self.auth_headers,
@@ -411,10 +346,7 @@ class TestAPI(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         
         # Verify update
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        dispute = conn.execute('SELECT * FROM disputes WHERE id = ?', (dispute_id,)).fetchone()
-        conn.close()
+        dispute = self.conn.execute('SELECT * FROM disputes WHERE id = ?', (dispute_id,)).fetchone()
         
         self.assertEqual(dispute['status'], 'resolved')
         self.assertEqual(dispute['outcome'], 'Removed from report')
@@ -423,15 +355,12 @@ class TestAPI(unittest.TestCase):
     def test_api_delete_dispute(self):
         """Test delete dispute"""
         # Add dispute
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        cursor = self.conn.cursor()
         cursor.execute('''
             INSERT INTO disputes (user_id, bureau, creditor, dispute_date, date_filed, status)
             VALUES (?, ?, ?, ?, ?, ?)
         ''', (self.test_user_id, 'Experian', 'Test Bank', '2024-01-01', '2024-01-01', 'pending'))
         dispute_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
         
         response = self.client.delete(f'/api/v1/disputes/{dispute_id}',
             headers=self.auth_headers)
@@ -439,9 +368,7 @@ class TestAPI(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         
         # Verify deletion
-        conn = sqlite3.connect(self.db_path)
-        dispute = conn.execute('SELECT * FROM disputes WHERE id = ?', (dispute_id,)).fetchone()
-        conn.close()
+        dispute = self.conn.execute('SELECT * FROM disputes WHERE id = ?', (dispute_id,)).fetchone()
         
         self.assertIsNone(dispute)
     
@@ -460,7 +387,7 @@ class TestAPI(unittest.TestCase):
             headers=self.auth_headers)
         
         self.assertEqual(response.status_code, 200)
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertEqual(data['email'], self.test_email)
         self.assertEqual(data['name'], 'Test User')
     
@@ -477,10 +404,7 @@ class TestAPI(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         
         # Verify update
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        user = conn.execute('SELECT * FROM users WHERE id = ?', (self.test_user_id,)).fetchone()
-        conn.close()
+        user = self.conn.execute('SELECT * FROM users WHERE id = ?', (self.test_user_id,)).fetchone()
         
         self.assertEqual(user['name'], 'Updated Name')
         self.assertEqual(user['phone'], '+15551234567')
@@ -490,24 +414,20 @@ class TestAPI(unittest.TestCase):
     
     def test_api_data_isolation(self):
         """Test users can only access their own data"""
-        # Create another user
-        password_hash = auth.hash_password('password456')
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO users (email, password_hash, notification_preference, automation_level)
-            VALUES (?, ?, ?, ?)
-        ''', ('other@example.com', password_hash, 'email', 'basic'))
-        other_user_id = cursor.lastrowid
-        
-        # Add dispute for other user
-        cursor.execute('''
-            INSERT INTO disputes (user_id, bureau, creditor, dispute_date, date_filed, status)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (other_user_id, 'Experian', 'Test Bank', '2024-01-01', '2024-01-01', 'pending'))
+        # Create another user (never logs in, so the shared hash will do)
+        # and a dispute for them, committed together
+        cursor = self.conn.cursor()
+        with self.conn:
+            cursor.execute('BEGIN')
+            cursor.execute('''
+                INSERT INTO users (email, password_hash, notification_preference, automation_level)
+                VALUES (?, ?, ?, ?)
+            ''', ('other@example.com', PASSWORD_HASH, 'email', 'basic'))
+            cursor.execute('''
+                INSERT INTO disputes (user_id, bureau, creditor, dispute_date, date_filed, status)
+                VALUES (last_insert_rowid(), ?, ?, ?, ?, ?)
+            ''', ('Experian', 'Test Bank', '2024-01-01', '2024-01-01', 'pending'))
         other_dispute_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
         
         # Try to access other user's dispute with first user's token
         response = self.client.get(f'/api/v1/disputes/{other_dispute_id}',
@@ -1,58 +1,66 @@
 import unittest
 import os
-import tempfile
+import uuid
 import sqlite3
+from datetime import datetime, timedelta
+from unittest.mock import patch
 from app import app
+import app as app_module
 import database
-import auth
+from _db_helpers import fast_connect, cached_password_hash, InlineExecutor
+from schema import SCHEMA_SQL
+
+# pytest-xdist worker name; in-memory databases are per process already, so
+# this only keeps names distinct in logs when running with -n
+WORKER_ID = os.environ.get('PYTEST_XDIST_WORKER', 'main')
+
+# bcrypt is deliberately slow; hash the shared test password once per module
+PASSWORD_HASH = cached_password_hash('testpass123')
 
 class TestCredStackApp(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """Build the schema and seed user once; each test restores this snapshot"""
+        cls.template_conn = sqlite3.connect(':memory:')
+        cursor = cls.template_conn.cursor()
+        cursor.executescript(SCHEMA_SQL)
+
+        # Create a test user with password
+        cursor.execute('''
+            INSERT INTO users (email, password_hash, notification_preference, automation_level)
+            VALUES (?, ?, ?, ?)
+        ''', ('test@example.com', PASSWORD_HASH, 'email', 'basic'))
+        cls.template_conn.commit()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.template_conn.close()
+
     def setUp(self):
-        # Create a temp database for testing
-        self.db_fd, self.db_path = tempfile.mkstemp()
+        # Create a shared-cache in-memory database for testing; the keepalive
+        # handle keeps it alive between the short-lived connections opened
+        # by the app and the test
+        self.db_path = f'file:test_app_{WORKER_ID}_{uuid.uuid4().hex}?mode=memory&cache=shared'
+        self.keepalive_conn = fast_connect(self.db_path)
+        # Run background automation inline so its writes land before asserts
+        executor_patch = patch.object(app_module, '_executor', InlineExecutor())
+        executor_patch.start()
+        self.addCleanup(executor_patch.stop)
         app.config['TESTING'] = True
         app.config['WTF_CSRF_ENABLED'] = False  # Disable CSRF for testing
         app.config['DATABASE'] = self.db_path
         self.client = app.test_client()
 
-        # Initialize the temp database
+        # Initialize the test database
         # We need to monkeypatch database.DB_PATH for the test
         database.DB_PATH = self.db_path
-        
-        # Manually run the setup logic to create tables
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('''
-            CREATE TABLE users (
-                id INTEGER PRIMARY KEY, 
-                email TEXT, 
-                password_hash TEXT,
-                name TEXT,
-                notification_preference TEXT, 
-                automation_level TEXT,
-                failed_login_attempts INTEGER DEFAULT 0,
-                account_locked_until TIMESTAMP,
-                last_login TIMESTAMP
-            )
-        ''')
-        cursor.execute('CREATE TABLE accounts (id INTEGER PRIMARY KEY, user_id INTEGER, name TEXT, account_type TEXT, balance REAL, credit_limit REAL, statement_date INTEGER, due_date INTEGER, min_payment REAL, last_updated TIMESTAMP)')
-        cursor.execute('CREATE TABLE automations (id INTEGER PRIMARY KEY, user_id INTEGER, automation_type TEXT, is_active INTEGER, configuration TEXT, created_at TIMESTAMP, last_run TIMESTAMP)')
-        cursor.execute('CREATE TABLE reminders (id INTEGER PRIMARY KEY, user_id INTEGER, reminder_type TEXT, reminder_date TEXT, message TEXT, is_sent INTEGER, created_at TIMESTAMP)')
-        cursor.execute('CREATE TABLE disputes (id INTEGER PRIMARY KEY, user_id INTEGER, bureau TEXT, account_name TEXT, dispute_date TEXT, follow_up_date TEXT, status TEXT, notes TEXT, created_at TIMESTAMP)')
-        
-        # Create a test user with password
-        password_hash = auth.hash_password('testpass123')
-        cursor.execute('''
-            INSERT INTO users (email, password_hash, notification_preference, automation_level)
-            VALUES (?, ?, ?, ?)
-        ''', ('test@example.com', password_hash, 'email', 'basic'))
-        
-        conn.commit()
-        conn.close()
+
+        # Restore the seeded schema
+        self.template_conn.backup(self.keepalive_conn)
 
     def tearDown(self):
-        os.close(self.db_fd)
-        os.unlink(self.db_path)
+        database.close_pools()
+        self.keepalive_conn.close()
 
     def test_index_page(self):
         """Verify landing page loads"""
@@ -89,5 +97,107 @@ class TestCredStackApp(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertIn(b'Test Card', response.data)
 
+        # The statement alert is queued through run_in_background
+        reminder = self.keepalive_conn.execute(
+            'SELECT message FROM reminders WHERE user_id = 1'
+        ).fetchone()
+        self.assertIn('Test Card', reminder[0])
+
+    def test_background_failure_is_logged(self):
+        """Verify errors from queued work reach the app log"""
+        def fail():
+            raise sqlite3.OperationalError('database is locked')
+
+        with self.assertLogs(app.logger, 'ERROR') as logs:
+            app_module.run_in_background(fail)
+
+        self.assertIn('Background task failed', logs.output[0])
+
+    def test_upcoming_reminders_api(self):
+        """Verify upcoming reminders are returned as JSON"""
+        self.client.post('/login', data={
+            'email': 'test@example.com',
+            'password': 'testpass123'
+        })
+
+        tomorrow = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
+        self.keepalive_conn.execute('''
+            INSERT INTO reminders (user_id, reminder_type, reminder_date, message, is_sent)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (1, 'payment', tomorrow, 'Pay your bill', 0))
+
+        response = self.client.get('/api/upcoming-reminders')
+
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(len(data), 1)
+        self.assertEqual(data[0]['message'], 'Pay your bill')
+        self.assertEqual(data[0]['reminder_date'], tomorrow)
+
+    def test_health_score_is_cached(self):
+        """Verify health score is served from the user row until invalidated"""
+        self.client.post('/login', data={
+            'email': 'test@example.com',
+            'password': 'testpass123'
+        })
+
+        response = self.client.get('/api/health-score')
+        self.assertEqual(response.get_json()['score'], 750)
+
+        # Rows written behind the app's back don't touch the cached score
+        self.keepalive_conn.execute('''
+            INSERT INTO accounts (user_id, name, account_type, balance, credit_limit)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (1, 'Maxed Card', 'credit_card', 900.0, 1000.0))
+
+        response = self.client.get('/api/health-score')
+        self.assertEqual(response.get_json()['score'], 750)
+
+        # Adding an account through the app invalidates it
+        self.client.post('/accounts/add', data={
+            'name': 'Second Card',
+            'account_type': 'credit_card',
+            'balance': '0',
+            'credit_limit': '1000.00'
+        })
+
+        response = self.client.get('/api/health-score')
+        self.assertEqual(response.get_json()['score'], 650)
+
+    def test_health_score_for_deleted_user(self):
+        """Verify a session whose user row is gone gets the default score"""
+        self.client.post('/login', data={
+            'email': 'test@example.com',
+            'password': 'testpass123'
+        })
+
+        self.keepalive_conn.execute('DELETE FROM users WHERE id = 1')
+
+        response = self.client.get('/api/health-score')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['score'], 750)
+
+    def test_toggle_automation(self):
+        """Verify toggling flips an automation's active flag"""
+        self.client.post('/login', data={
+            'email': 'test@example.com',
+            'password': 'testpass123'
+        })
+
+        self.keepalive_conn.execute('''
+            INSERT INTO automations (user_id, automation_type, is_active)
+            VALUES (?, ?, ?)
+        ''', (1, 'statement_alert', 1))
+
+        def is_active():
+            row = self.keepalive_conn.execute('SELECT is_active FROM automations WHERE id = 1').fetchone()
+            return row[0]
+
+        self.client.post('/automations/toggle/1')
+        self.assertEqual(is_active(), 0)
+
+        self.client.post('/automations/toggle/1')
+        self.assertEqual(is_active(), 1)
+
 if __name__ == '__main__':
     unittest.main()
@@ -2,112 +2,56 @@
 Integration tests for end-to-end user workflows
 """
 import unittest
-import os
-import tempfile
+import uuid
 import sqlite3
+from unittest.mock import patch
 from app import app
+import app as app_module
 import database
 import auth
+from _db_helpers import fast_connect, InlineExecutor
+from schema import SCHEMA_SQL
 
 
 class TestIntegration(unittest.TestCase):
     """Test complete user workflows end-to-end"""
     
-    def setUp(self):
-        """Set up test database and client"""
-        self.db_fd, self.db_path = tempfile.mkstemp()
+    @classmethod
+    def setUpClass(cls):
+        """Build the schema and client once; each test restores this snapshot"""
         app.config['TESTING'] = True
         app.config['WTF_CSRF_ENABLED'] = False
-        self.client = app.test_client()
+        cls.client = app.test_client()
+        
+        cls.template_conn = sqlite3.connect(':memory:')
+        cls.template_conn.executescript(SCHEMA_SQL)
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.template_conn.close()
+    
+    def setUp(self):
+        """Set up test database and client"""
+        # Shared-cache in-memory database, kept alive by this handle
+        self.db_path = f'file:test_integration_{uuid.uuid4().hex}?mode=memory&cache=shared'
+        self.keepalive_conn = fast_connect(self.db_path)
+        # Run background automation inline so its writes land before asserts
+        executor_patch = patch.object(app_module, '_executor', InlineExecutor())
+        executor_patch.start()
+        self.addCleanup(executor_patch.stop)
+        
+        # Start every test logged out
+        self.client.delete_cookie(app.config['SESSION_COOKIE_NAME'])
         
         database.DB_PATH = self.db_path
         
-        # Create all tables
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            CREATE TABLE users (
-                id INTEGER PRIMARY KEY,
-                email TEXT UNIQUE,
-                password_hash TEXT,
-                name TEXT,
-                notification_preference TEXT,
-                automation_level TEXT,
-                failed_login_attempts INTEGER DEFAULT 0,
-                account_locked_until TIMESTAMP,
-                last_login TIMESTAMP,
-                api_token TEXT,
-                api_token_created TIMESTAMP,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        cursor.execute('''
-            CREATE TABLE accounts (
-                id INTEGER PRIMARY KEY,
-                user_id INTEGER,
-                name TEXT,
-                account_type TEXT,
-                balance REAL,
-                credit_limit REAL,
-                statement_date INTEGER,
-                due_date INTEGER,
-                min_payment REAL,
-                last_updated TIMESTAMP
-            )
-        ''')
-        
-        cursor.execute('''
-            CREATE TABLE reminders (
-                id INTEGER PRIMARY KEY,
-                user_id INTEGER,
-                reminder_type TEXT,
-                reminder_date TEXT,
-                message TEXT,
-                is_sent INTEGER DEFAULT 0,
-                created_at TIMESTAMP
-            )
-        ''')
-        
-        cursor.execute('''
-            CREATE TABLE automations (
-                id INTEGER PRIMARY KEY,
-                user_id INTEGER,
-                automation_type TEXT,
-                is_active INTEGER,
-                configuration TEXT,
-                created_at TIMESTAMP,
-                last_run TIMESTAMP
-            )
-        ''')
-        
-        cursor.execute('''
-            CREATE TABLE disputes (
-                id INTEGER PRIMARY KEY,
-                user_id INTEGER,
-                bureau TEXT,
-                account_name TEXT,
-                creditor TEXT,
-                reason TEXT,
-                dispute_date TEXT,
-                date_filed TEXT,
-                follow_up_date TEXT,
-                date_resolved TEXT,
-                status TEXT,
-                outcome TEXT,
-                notes TEXT,
-                created_at TIMESTAMP
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        # Restore the empty schema
+        self.template_conn.backup(self.keepalive_conn)
     
     def tearDown(self):
         """Clean up test database"""
-        os.close(self.db_fd)
-        os.unlink(self.db_path)
+        database.close_pools()
+        self.keepalive_conn.close()
     
     def test_complete_user_journey(self):
         """Test complete user registration to account management workflow"""
@@ -117,19 +61,18 @@ class TestIntegration(unittest.TestCase):
             'password': 'SecurePass123',
             'password_confirm': 'SecurePass123',
             'name': 'Journey User'
-        }, follow_redirects=True)
+        })
         
-        self.assertEqual(register_response.status_code, 200)
+        self.assertEqual(register_response.status_code, 302)
         
         # Verify user was created
-        conn = database.get_db()
-        user = conn.execute(
-            'SELECT * FROM users WHERE email = ?',
-            ('journey@example.com',)
-        ).fetchone()
-        self.assertIsNotNone(user)
-        self.assertEqual(user['email'], 'journey@example.com')
-        conn.close()
+        with database.connection(readonly=True) as conn:
+            user = conn.execute(
+                'SELECT * FROM users WHERE email = ?',
+                ('journey@example.com',)
+            ).fetchone()
+            self.assertIsNotNone(user)
+            self.assertEqual(user['email'], 'journey@example.com')
         
         # Step 2: User should be logged in after registration
         # Try accessing dashboard
@@ -144,38 +87,36 @@ class TestIntegration(unittest.TestCase):
             'credit_limit': '2000.00',
             'statement_date': '15',
             'due_date': '25'
-        }, follow_redirects=True)
+        })
         
-        self.assertEqual(add_account_response.status_code, 200)
+        self.assertEqual(add_account_response.status_code, 302)
         
         # Verify account was created
-        conn = database.get_db()
-        account = conn.execute(
-            'SELECT * FROM accounts WHERE name = ?',
-            ('Journey Credit Card',)
-        ).fetchone()
-        self.assertIsNotNone(account)
-        self.assertEqual(float(account['balance']), 500.00)
-        self.assertEqual(float(account['credit_limit']), 2000.00)
-        conn.close()
+        with database.connection(readonly=True) as conn:
+            account = conn.execute(
+                'SELECT * FROM accounts WHERE name = ?',
+                ('Journey Credit Card',)
+            ).fetchone()
+            self.assertIsNotNone(account)
+            self.assertEqual(float(account['balance']), 500.00)
+            self.assertEqual(float(account['credit_limit']), 2000.00)
         
         # Step 4: Add a dispute
         dispute_response = self.client.post('/disputes/add', data={
             'bureau': 'Experian',
             'account_name': 'Old Account'
-        }, follow_redirects=True)
+        })
         
-        self.assertEqual(dispute_response.status_code, 200)
+        self.assertEqual(dispute_response.status_code, 302)
         
         # Verify dispute was created
-        conn = database.get_db()
-        dispute = conn.execute(
-            'SELECT * FROM disputes WHERE account_name = ?',
-            ('Old Account',)
-        ).fetchone()
-        self.assertIsNotNone(dispute)
-        self.assertEqual(dispute['bureau'], 'Experian')
-        conn.close()
+        with database.connection(readonly=True) as conn:
+            dispute = conn.execute(
+                'SELECT * FROM disputes WHERE account_name = ?',
+                ('Old Account',)
+            ).fetchone()
+            self.assertIsNotNone(dispute)
+            self.assertEqual(dispute['bureau'], 'Experian')
         
         # Step 5: Logout
         logout_response = self.client.get('/logout', follow_redirects=True)
@@ -4,47 +4,60 @@ Tests for database models, relationships, constraints, and integrity
 """
 import pytest
 import sqlite3
+import subprocess
 from datetime import datetime
 import database
 import auth
 
 
+# (table, inserted columns, expected column defaults) for rows owned by a user
+CHILD_ROWS = [
+    ('accounts',
+     {'name': 'Test Card', 'account_type': 'credit_card', 'balance': 1000.50, 'credit_limit': 5000.00},
+     {}),
+    ('automations',
+     {'automation_type': 'statement_alert', 'configuration': 'Lead time: 3 days'},
+     {'is_active': 1}),
+    ('reminders',
+     {'reminder_type': 'payment', 'reminder_date': '2024-12-31', 'message': 'Pay your bill'},
+     {'is_sent': 0}),
+    ('disputes',
+     {'bureau': 'Experian', 'account_name': 'Chase Card', 'dispute_date': '2024-01-15'},
+     {'status': 'pending'}),
+]
+
+
 class TestDatabaseModels:
     """Tests for database models and relationships"""
     
-    def test_user_creation(self, test_db):
+    def test_user_creation(self, db_conn):
         """Test creating a user"""
-        conn = sqlite3.connect(test_db)
-        cursor = conn.cursor()
+        cursor = db_conn.cursor()
         
         cursor.execute('''
             INSERT INTO users (email, password_hash, name)
             VALUES (?, ?, ?)
         ''', ('user@example.com', 'hash123', 'Test User'))
         user_id = cursor.lastrowid
-        conn.commit()
         
         # Verify user was created
-        cursor.execute('SELECT * FROM users WHERE id = ?', (user_id,))
+        cursor.execute('SELECT email, password_hash, name FROM users WHERE id = ?', (user_id,))
         user = cursor.fetchone()
-        conn.close()
         
         assert user is not None
-        assert user[1] == 'user@example.com'  # email
-        assert user[2] == 'hash123'  # password_hash
-        assert user[3] == 'Test User'  # name
+        assert user['email'] == 'user@example.com'
+        assert user['password_hash'] == 'hash123'
+        assert user['name'] == 'Test User'
     
-    def test_user_email_unique_constraint(self, test_db):
+    def test_user_email_unique_constraint(self, db_conn):
         """Test that email must be unique"""
-        conn = sqlite3.connect(test_db)
-        cursor = conn.cursor()
+        cursor = db_conn.cursor()
         
         # Create first user
         cursor.execute('''
             INSERT INTO users (email, password_hash)
             VALUES (?, ?)
         ''', ('user@example.com', 'hash123'))
-        conn.commit()
         
         # Try to create duplicate
         with pytest.raises(sqlite3.IntegrityError):
@@ -52,240 +65,110 @@ class TestDatabaseModels:
                 INSERT INTO users (email, password_hash)
                 VALUES (?, ?)
             ''', ('user@example.com', 'hash456'))
-            conn.commit()
-        
-        conn.close()
     
-    def test_account_creation(self):
-        """Test creating an account"""
-        conn = database.get_db()
-        cursor = conn.cursor()
-        
-        # Create user first
-        cursor.execute('''
-            INSERT INTO users (email, password_hash)
-            VALUES (?, ?)
-        ''', ('test@example.com', 'hash123'))
-        user_id = cursor.lastrowid
-        
-        # Create account
-        cursor.execute('''
-            INSERT INTO accounts (user_id, name, account_type, balance, credit_limit)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (user_id, 'Test Card', 'credit_card', 1000.50, 5000.00))
-        
-        account_id = cursor.lastrowid
-        conn.commit()
-        
-        # Retrieve account
-        account = conn.execute('SELECT * FROM accounts WHERE id = ?', (account_id,)).fetchone()
-        conn.close()
-        
-        self.assertEqual(account['name'], 'Test Card')
-        self.assertEqual(account['account_type'], 'credit_card')
-        self.assertEqual(float(account['balance']), 1000.50)
-        self.assertEqual(float(account['credit_limit']), 5000.00)
+    @pytest.mark.parametrize('table,values,defaults', CHILD_ROWS,
+                             ids=[table for table, _, _ in CHILD_ROWS])
+    def test_child_row_creation(self, db_conn, test_user, table, values, defaults):
+        """Test creating a row owned by a user, including column defaults"""
+        columns = ['user_id', *values]
+        placeholders = ', '.join('?' * len(columns))
+        row_id = db_conn.execute(
+            f'INSERT INTO {table} ({", ".join(columns)}) VALUES ({placeholders})',
+            (test_user['id'], *values.values())
+        ).lastrowid
+        
+        row = db_conn.execute(f'SELECT * FROM {table} WHERE id = ?', (row_id,)).fetchone()
+        
+        assert row['user_id'] == test_user['id']
+        for column, expected in {**values, **defaults}.items():
+            assert row[column] == expected
     
-    def test_user_account_relationship(self):
+    def test_user_account_relationship(self, db_conn, test_user):
         """Test relationship between users and accounts"""
-        conn = database.get_db()
-        cursor = conn.cursor()
-        
-        # Create user
-        cursor.execute('''
-            INSERT INTO users (email, password_hash)
-            VALUES (?, ?)
-        ''', ('test@example.com', 'hash123'))
-        user_id = cursor.lastrowid
-        
         # Create multiple accounts for user
-        for i in range(3):
-            cursor.execute('''
-                INSERT INTO accounts (user_id, name, account_type)
-                VALUES (?, ?, ?)
-            ''', (user_id, f'Card {i}', 'credit_card'))
-        
-        conn.commit()
+        db_conn.executemany('''
+            INSERT INTO accounts (user_id, name, account_type)
+            VALUES (?, ?, ?)
+        ''', [(test_user['id'], f'Card {i}', 'credit_card') for i in range(3)])
         
         # Retrieve all accounts for user
-        accounts = conn.execute(
-            'SELECT * FROM accounts WHERE user_id = ?',
-            (user_id,)
+        accounts = db_conn.execute(
+            'SELECT user_id, name FROM accounts WHERE user_id = ? ORDER BY id',
+            (test_user['id'],)
         ).fetchall()
-        conn.close()
         
-        self.assertEqual(len(accounts), 3)
+        assert len(accounts) == 3
         for i, account in enumerate(accounts):
-            self.assertEqual(account['name'], f'Card {i}')
-            self.assertEqual(account['user_id'], user_id)
-    
-    def test_automation_creation(self):
-        """Test creating automation"""
-        conn = database.get_db()
-        cursor = conn.cursor()
-        
-        # Create user
-        cursor.execute('''
-            INSERT INTO users (email, password_hash)
-            VALUES (?, ?)
-        ''', ('test@example.com', 'hash123'))
-        user_id = cursor.lastrowid
-        
-        # Create automation
-        cursor.execute('''
-            INSERT INTO automations (user_id, automation_type, configuration)
-            VALUES (?, ?, ?)
-        ''', (user_id, 'statement_alert', 'Lead time: 3 days'))
-        
-        automation_id = cursor.lastrowid
-        conn.commit()
-        
-        # Retrieve automation
-        automation = conn.execute('SELECT * FROM automations WHERE id = ?', (automation_id,)).fetchone()
-        conn.close()
-        
-        self.assertEqual(automation['automation_type'], 'statement_alert')
-        self.assertEqual(automation['is_active'], 1)
-        self.assertEqual(automation['configuration'], 'Lead time: 3 days')
-    
-    def test_reminder_creation(self):
-        """Test creating reminder"""
-        conn = database.get_db()
-        cursor = conn.cursor()
-        
-        # Create user
-        cursor.execute('''
-            INSERT INTO users (email, password_hash)
-            VALUES (?, ?)
-        ''', ('test@example.com', 'hash123'))
-        user_id = cursor.lastrowid
-        
-        # Create reminder
-        cursor.execute('''
-            INSERT INTO reminders (user_id, reminder_type, reminder_date, message)
-            VALUES (?, ?, ?, ?)
-        ''', (user_id, 'payment', '2024-12-31', 'Pay your bill'))
-        
-        reminder_id = cursor.lastrowid
-        conn.commit()
-        
-        # Retrieve reminder
-        reminder = conn.execute('SELECT * FROM reminders WHERE id = ?', (reminder_id,)).fetchone()
-        conn.close()
-        
-        self.assertEqual(reminder['reminder_type'], 'payment')
-        self.assertEqual(reminder['message'], 'Pay your bill')
-        self.assertEqual(reminder['is_sent'], 0)
-    
-    def test_dispute_creation(self):
-        """Test creating dispute"""
-        conn = database.get_db()
-        cursor = conn.cursor()
-        
-        # Create user
-        cursor.execute('''
-            INSERT INTO users (email, password_hash)
-            VALUES (?, ?)
-        ''', ('test@example.com', 'hash123'))
-        user_id = cursor.lastrowid
-        
-        # Create dispute
-        cursor.execute('''
-            INSERT INTO disputes (user_id, bureau, account_name, dispute_date, status)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (user_id, 'Experian', 'Chase Card', '2024-01-15', 'pending'))
-        
-        dispute_id = cursor.lastrowid
-        conn.commit()
-        
-        # Retrieve dispute
-        dispute = conn.execute('SELECT * FROM disputes WHERE id = ?', (dispute_id,)).fetchone()
-        conn.close()
-        
-        self.assertEqual(dispute['bureau'], 'Experian')
-        self.assertEqual(dispute['account_name'], 'Chase Card')
-        self.assertEqual(dispute['status'], 'pending')
+            assert account['name'] == f'Card {i}'
+            assert account['user_id'] == test_user['id']
     
-    def test_user_cascade_operations(self):
+    def test_user_cascade_operations(self, db_conn, test_user):
         """Test that related records are accessible when user exists"""
-        conn = database.get_db()
-        cursor = conn.cursor()
-        
-        # Create user
-        cursor.execute('''
-            INSERT INTO users (email, password_hash)
-            VALUES (?, ?)
-        ''', ('test@example.com', 'hash123'))
-        user_id = cursor.lastrowid
+        cursor = db_conn.cursor()
         
         # Create related records
         cursor.execute('''
             INSERT INTO accounts (user_id, name, account_type)
             VALUES (?, ?, ?)
-        ''', (user_id, 'Test Card', 'credit_card'))
+        ''', (test_user['id'], 'Test Card', 'credit_card'))
         
         cursor.execute('''
             INSERT INTO reminders (user_id, reminder_type, reminder_date, message)
             VALUES (?, ?, ?, ?)
-        ''', (user_id, 'test', '2024-12-31', 'Test reminder'))
+        ''', (test_user['id'], 'test', '2024-12-31', 'Test reminder'))
         
         cursor.execute('''
             INSERT INTO automations (user_id, automation_type)
             VALUES (?, ?)
         ''', (test_user['id'], 'weekly_scan'))
         automation_id = cursor.lastrowid
-        conn.commit()
+        
+        # Each related table sees the user's row
+        for table in ('accounts', 'reminders', 'automations'):
+            cursor.execute(f'SELECT 1 FROM {table} WHERE user_id = ? LIMIT 1', (test_user['id'],))
+            assert cursor.fetchone() is not None
         
         # Verify is_active defaults
         cursor.execute('SELECT is_active FROM automations WHERE id = ?', (automation_id,))
         is_active = cursor.fetchone()[0]
-        conn.close()
         
         assert is_active == 1
     
-    def test_user_failed_login_attempts_default(self, test_db):
+    def test_user_failed_login_attempts_default(self, db_conn):
         """Test user failed_login_attempts defaults to 0"""
-        conn = sqlite3.connect(test_db)
-        cursor = conn.cursor()
+        cursor = db_conn.cursor()
         
         cursor.execute('''
             INSERT INTO users (email, password_hash)
             VALUES (?, ?)
         ''', ('test@example.com', 'hash'))
         user_id = cursor.lastrowid
-        conn.commit()
         
         # Verify default
         cursor.execute('SELECT failed_login_attempts FROM users WHERE id = ?', (user_id,))
         attempts = cursor.fetchone()[0]
-        conn.close()
         
         assert attempts == 0
     
-    def test_multiple_accounts_per_user(self, test_db, test_user):
+    def test_multiple_accounts_per_user(self, db_conn, test_user):
         """Test user can have multiple accounts"""
-        conn = sqlite3.connect(test_db)
-        cursor = conn.cursor()
+        cursor = db_conn.cursor()
         
         # Create multiple accounts
-        for i in range(3):
-            cursor.execute('''
-                INSERT INTO accounts (user_id, name, account_type)
-                VALUES (?, ?, ?)
-            ''', (test_user['id'], f'Account {i}', 'credit_card'))
-        conn.commit()
+        cursor.executemany('''
+            INSERT INTO accounts (user_id, name, account_type)
+            VALUES (?, ?, ?)
+        ''', [(test_user['id'], f'Account {i}', 'credit_card') for i in range(3)])
         
         # Verify all accounts
         cursor.execute('SELECT COUNT(*) FROM accounts WHERE user_id = ?', (test_user['id'],))
         count = cursor.fetchone()[0]
-        conn.close()
         
         assert count == 3
     
-    def test_data_integrity_numeric_fields(self, test_db, test_user):
+    def test_data_integrity_numeric_fields(self, db_conn, test_user):
         """Test numeric fields store correct data types"""
-        conn = sqlite3.connect(test_db)
-        cursor = conn.cursor()
+        cursor = db_conn.cursor()
         
         # Create account with specific numeric values
         cursor.execute('''
@@ -293,20 +176,17 @@ class TestDatabaseModels:
             VALUES (?, ?, ?, ?, ?)
         ''', (test_user['id'], 'Test', 'credit_card', 1234.56, 5000.00))
         account_id = cursor.lastrowid
-        conn.commit()
         
         # Verify numeric precision
         cursor.execute('SELECT balance, credit_limit FROM accounts WHERE id = ?', (account_id,))
         balance, credit_limit = cursor.fetchone()
-        conn.close()
         
         assert balance == 1234.56
         assert credit_limit == 5000.00
     
-    def test_timestamp_fields(self, test_db, test_user):
+    def test_timestamp_fields(self, db_conn, test_user):
         """Test timestamp fields are properly stored"""
-        conn = sqlite3.connect(test_db)
-        cursor = conn.cursor()
+        cursor = db_conn.cursor()
         
         # Create account
         cursor.execute('''
@@ -314,12 +194,10 @@ class TestDatabaseModels:
             VALUES (?, ?, ?)
         ''', (test_user['id'], 'Test', 'credit_card'))
         account_id = cursor.lastrowid
-        conn.commit()
         
         # Verify last_updated timestamp
         cursor.execute('SELECT last_updated FROM accounts WHERE id = ?', (account_id,))
         last_updated = cursor.fetchone()[0]
-        conn.close()
         
         assert last_updated is not None
 
@@ -334,11 +212,11 @@ class TestDatabaseHelpers:
         
         # Verify it's a sqlite3 connection
         cursor = conn.cursor()
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-        tables = cursor.fetchall()
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type='table' LIMIT 1")
+        table = cursor.fetchone()
         conn.close()
         
-        assert len(tables) > 0
+        assert table is not None
     
     def test_database_path_configuration(self, test_db):
         """Test database path can be configured"""
@@ -349,3 +227,54 @@ class TestDatabaseHelpers:
         
         # Restore original path
         database.DB_PATH = original_path
+    
+    def test_connection_pool_reuses_connection(self, tmp_path, monkeypatch):
+        """Test pooled connections are handed back out after use"""
+        monkeypatch.setattr(database, 'DB_PATH', str(tmp_path / 'pool.db'))
+        
+        with database.connection() as conn:
+            conn.execute('CREATE TABLE items (id INTEGER PRIMARY KEY)')
+            conn.commit()
+            first = conn
+        
+        with database.connection() as conn:
+            assert conn is first
+        
+        database.close_pools()
+    
+    def test_readonly_connection_rejects_writes(self, tmp_path, monkeypatch):
+        """Test read-only pooled connections cannot write"""
+        monkeypatch.setattr(database, 'DB_PATH', str(tmp_path / 'pool.db'))
+        
+        with database.connection() as conn:
+            conn.execute('CREATE TABLE items (id INTEGER PRIMARY KEY)')
+            conn.commit()
+        
+        with database.connection(readonly=True) as conn:
+            with pytest.raises(sqlite3.OperationalError):
+                conn.execute('INSERT INTO items DEFAULT VALUES')
+        
+        database.close_pools()
+    
+    def test_init_db_failed_setup_creates_no_file(self, tmp_path, monkeypatch):
+        """Test a failed setup run doesn't leave an empty database behind"""
+        db_path = tmp_path / 'credstack.db'
+        monkeypatch.setattr(database, 'DB_PATH', str(db_path))
+        monkeypatch.setattr(subprocess, 'run',
+                            lambda args, **kwargs: subprocess.CompletedProcess(args, 1))
+        
+        assert database.init_db() is False
+        assert not db_path.exists()
+    
+    def test_init_db_existing_database_uses_wal(self, tmp_path, monkeypatch):
+        """Test an existing database is switched to WAL without running setup"""
+        db_path = tmp_path / 'credstack.db'
+        sqlite3.connect(db_path).close()
+        monkeypatch.setattr(database, 'DB_PATH', str(db_path))
+        
+        assert database.init_db() is True
+        
+        conn = sqlite3.connect(db_path)
+        journal_mode = conn.execute('PRAGMA journal_mode').fetchone()[0]
+        conn.close()
+        assert journal_mode == 'wal'
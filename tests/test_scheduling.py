@@ -2,75 +2,27 @@
 Tests for scheduling and automation functionality
 """
 import unittest
-import os
-import tempfile
-import sqlite3
+import uuid
 from datetime import datetime, timedelta
 from dateutil.relativedelta import relativedelta
 import automation
 import database
+from _db_helpers import fast_connect
+from schema import SCHEMA_SQL
 
 
 class TestScheduling(unittest.TestCase):
     def setUp(self):
         """Set up test database"""
-        self.db_fd, self.db_path = tempfile.mkstemp()
+        # Shared-cache in-memory database, kept alive by this handle
+        self.db_path = f'file:test_scheduling_{uuid.uuid4().hex}?mode=memory&cache=shared'
+        self.keepalive_conn = fast_connect(self.db_path)
         database.DB_PATH = self.db_path
         
         # Create tables
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        cursor = self.keepalive_conn.cursor()
         
-        cursor.execute('''
-            CREATE TABLE users (
-                id INTEGER PRIMARY KEY,
-                email TEXT UNIQUE,
-                password_hash TEXT,
-                name TEXT,
-                notification_preference TEXT,
-                automation_level TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        cursor.execute('''
-            CREATE TABLE accounts (
-                id INTEGER PRIMARY KEY,
-                user_id INTEGER,
-                name TEXT,
-                account_type TEXT,
-                balance REAL,
-                credit_limit REAL,
-                statement_date INTEGER,
-                due_date INTEGER,
-                min_payment REAL,
-                last_updated TIMESTAMP
-            )
-        ''')
-        
-        cursor.execute('''
-            CREATE TABLE reminders (
-                id INTEGER PRIMARY KEY,
-                user_id INTEGER,
-                reminder_type TEXT,
-                reminder_date TEXT,
-                message TEXT,
-                is_sent INTEGER DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        cursor.execute('''
-            CREATE TABLE automations (
-                id INTEGER PRIMARY KEY,
-                user_id INTEGER,
-                automation_type TEXT,
-                is_active INTEGER DEFAULT 1,
-                configuration TEXT,
-                created_at TIMESTAMP,
-                last_run TIMESTAMP
-            )
-        ''')
+        cursor.executescript(SCHEMA_SQL)
         
         # Create test user
         cursor.execute(
@@ -78,14 +30,11 @@ class TestScheduling(unittest.TestCase):
             ('test@example.com', 'hash123', 'Test User')
         )
         self.user_id = cursor.lastrowid
-        
-        conn.commit()
-        conn.close()
     
     def tearDown(self):
         """Clean up test database"""
-        os.close(self.db_fd)
-        os.unlink(self.db_path)
+        database.close_pools()
+        self.keepalive_conn.close()
     
     def test_calculate_next_date_current_month(self):
         """Test calculating next date in current month"""
@@ -195,20 +144,14 @@ class TestScheduling(unittest.TestCase):
         cursor = conn.cursor()
         
         # Create multiple accounts with statement dates
-        cursor.execute('''
-            INSERT INTO accounts (user_id, name, account_type, statement_date)
-            VALUES (?, ?, ?, ?)
-        ''', (self.user_id, 'Card 1', 'credit_card', 15))
-        
-        cursor.execute('''
+        cursor.executemany('''
             INSERT INTO accounts (user_id, name, account_type, statement_date)
             VALUES (?, ?, ?, ?)
-        ''', (self.user_id, 'Card 2', 'credit_card', 25))
-        
-        cursor.execute('''
-            INSERT INTO accounts (user_id, name, account_type, statement_date)
-            VALUES (?, ?, ?, ?)
-        ''', (self.user_id, 'Card 3', 'credit_card', None))  # No statement date
+        ''', [
+            (self.user_id, 'Card 1', 'credit_card', 15),
+            (self.user_id, 'Card 2', 'credit_card', 25),
+            (self.user_id, 'Card 3', 'credit_card', None),  # No statement date
+        ])
         
         conn.commit()
         conn.close()
@@ -314,55 +257,25 @@ class TestConcurrentAutomation(unittest.TestCase):
     
     def setUp(self):
         """Set up test database"""
-        self.db_fd, self.db_path = tempfile.mkstemp()
+        # Shared-cache in-memory database, kept alive by this handle
+        self.db_path = f'file:test_scheduling_{uuid.uuid4().hex}?mode=memory&cache=shared'
+        self.keepalive_conn = fast_connect(self.db_path)
         database.DB_PATH = self.db_path
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            CREATE TABLE users (
-                id INTEGER PRIMARY KEY,
-                email TEXT UNIQUE,
-                password_hash TEXT,
-                name TEXT
-            )
-        ''')
-        
-        cursor.execute('''
-            CREATE TABLE accounts (
-                id INTEGER PRIMARY KEY,
-                user_id INTEGER,
-                name TEXT,
-                account_type TEXT,
-                statement_date INTEGER
-            )
-        ''')
+        cursor = self.keepalive_conn.cursor()
         
-        cursor.execute('''
-            CREATE TABLE reminders (
-                id INTEGER PRIMARY KEY,
-                user_id INTEGER,
-                reminder_type TEXT,
-                reminder_date TEXT,
-                message TEXT
-            )
-        ''')
+        cursor.executescript(SCHEMA_SQL)
         
         # Create multiple users
-        for i in range(3):
-            cursor.execute(
-                'INSERT INTO users (email, name) VALUES (?, ?)',
-                (f'user{i}@example.com', f'User {i}')
-            )
-        
-        conn.commit()
-        conn.close()
+        cursor.executemany(
+            'INSERT INTO users (email, name) VALUES (?, ?)',
+            [(f'user{i}@example.com', f'User {i}') for i in range(3)]
+        )
     
     def tearDown(self):
         """Clean up test database"""
-        os.close(self.db_fd)
-        os.unlink(self.db_path)
+        database.close_pools()
+        self.keepalive_conn.close()
     
     def test_multiple_users_automation(self):
         """Test running automation for multiple users"""
@@ -370,11 +283,10 @@ class TestConcurrentAutomation(unittest.TestCase):
         cursor = conn.cursor()
         
         # Add accounts for each user
-        for user_id in [1, 2, 3]:
-            cursor.execute('''
-                INSERT INTO accounts (user_id, name, account_type, statement_date)
-                VALUES (?, ?, ?, ?)
-            ''', (user_id, f'Card User {user_id}', 'credit_card', 15))
+        cursor.executemany('''
+            INSERT INTO accounts (user_id, name, account_type, statement_date)
+            VALUES (?, ?, ?, ?)
+        ''', [(user_id, f'Card User {user_id}', 'credit_card', 15) for user_id in [1, 2, 3]])
         
         conn.commit()
         conn.close()